@@ -71,15 +71,42 @@ v2.8 - Added contraction kinetics (rise/relax times).
 
 import numpy as np
 import pandas as pd
-from scipy.signal import find_peaks
+import matplotlib
+matplotlib.use('Agg')  # Plots are only saved; also safe in worker processes
 import matplotlib.pyplot as plt
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, lru_cache
+from collections import namedtuple
+from dataclasses import dataclass
+import os
 import sys
 import warnings
 import shutil
+import mmap
+import re
+import json
 from datetime import datetime
 
-warnings.filterwarnings('ignore')
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
 
 # =============================================================================
 # USER-CONFIGURABLE PARAMETERS
@@ -124,6 +151,12 @@ warnings.filterwarnings('ignore')
 # FLAG_AMPLITUDE_THRESHOLD: Amplitude below which files get flagged (mN).
 #   - Files are NOT excluded, just flagged for manual review.
 #   - Helps catch traces where noise may have been counted as contractions.
+#
+# PROMINENCE_WLEN_SEC: Window (seconds) for the prominence search, or None.
+#   - None (default) measures prominence against the whole trace, exactly
+#     as all published results were produced.
+#   - A finite window (e.g. 4) makes prominence purely local. This CHANGES
+#     which peaks pass and their widths, so keep it fixed within a project.
 # =============================================================================
 
 PEAK_HEIGHT = 0.05           # mN - Minimum peak height above baseline
@@ -134,30 +167,224 @@ SAMPLING_RATE = 250          # Hz - LabChart sampling rate
 TIME_WINDOW = 150            # seconds - Analysis window
 BIN_DURATION = 10            # seconds - Bin size for temporal analysis
 FLAG_AMPLITUDE_THRESHOLD = 0.03  # mN - Flag files with mean amp below this
+PROMINENCE_WLEN_SEC = None   # seconds - Prominence search window (None = whole trace)
 
 # =============================================================================
 # END OF USER-CONFIGURABLE PARAMETERS
 # =============================================================================
 
+# Search windows (in samples) around each peak for kinetics and contraction
+# boundaries, derived once from SAMPLING_RATE
+_PRE_PEAK_SAMPLES = int(SAMPLING_RATE)               # 1 sec before peak
+_RELAX_SEARCH_SAMPLES = int(2 * SAMPLING_RATE)       # 2 sec after peak
+_BOUNDARY_SEARCH_SAMPLES = int(1.5 * SAMPLING_RATE)  # 1.5 sec after peak
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    Analysis parameters for one run, fixed for every file in it.
+
+    Defaults are the user-configurable values above; main() applies the
+    command-line PEAK_HEIGHT override by building a new Config rather than
+    changing the module constants. SAMPLING_RATE stays a module constant:
+    the sample-based search windows of the kinetics are derived from it.
+    """
+    peak_height: float = PEAK_HEIGHT
+    peak_prominence: float = PEAK_PROMINENCE
+    peak_distance: int = PEAK_DISTANCE
+    peak_width: int = PEAK_WIDTH
+    prominence_wlen_sec: float = PROMINENCE_WLEN_SEC
+    time_window: float = TIME_WINDOW
+    bin_duration: float = BIN_DURATION
+    flag_threshold: float = FLAG_AMPLITUDE_THRESHOLD
+
+# First all-numeric row of a LabChart export (time + at least one channel).
+# Everything above it is the metadata header (Interval=, ChannelTitle=, ...).
+_DATA_LINE_RE = re.compile(
+    rb'^[ \t]*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+    rb'(?:[ \t,]+[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)+[ \t\r]*$',
+    re.MULTILINE
+)
+
+
+def _find_data_start(filepath):
+    """
+    Locate the first numeric data row of a LabChart export.
+
+    Scans a memory map of the file so only the header bytes are touched.
+
+    Returns
+    -------
+    skiprows : int or None
+        Number of header lines before the data (None if no data row found)
+    delimiter : str or None
+        Column delimiter inferred from the first data row
+    """
+    with open(filepath, 'rb') as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            match = _DATA_LINE_RE.search(mm)
+            if match is None:
+                return None, None
+            skiprows = mm[:match.start()].count(b'\n')
+            first_row = match.group(0)
+
+    if b'\t' in first_row:
+        delimiter = '\t'
+    elif b',' in first_row:
+        delimiter = ','
+    else:
+        delimiter = ' '
+    return skiprows, delimiter
+
+
+def _is_valid_trace(time):
+    """Sanity checks shared by all parsing strategies."""
+    return len(time) > 100 and np.all(np.diff(time) > 0)
+
+
+def _last_data_time(filepath):
+    """
+    Time stamp of the last data row, read from the end of the file.
+
+    Lets a trace that was only parsed up to the analysis window still report
+    the full recording duration. Returns None if no data row is found in the
+    last few kilobytes.
+    """
+    with open(filepath, 'rb') as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            tail = mm[max(0, len(mm) - 4096):]
+    last = None
+    for last in _DATA_LINE_RE.finditer(tail):
+        pass
+    if last is None:
+        return None
+    try:
+        return float(re.split(rb'[ \t,]+', last.group(0).strip())[0])
+    except ValueError:
+        return None
+
+
+def _load_with_pyarrow(filepath, max_seconds=None):
+    """
+    Fast path: parse the numeric block with pyarrow's C++ CSV reader.
+
+    With ``max_seconds``, the block is streamed and parsing stops after the
+    first chunk that reaches ``max_seconds`` past the first time stamp, so
+    the returned trace may end early (it always covers the window).
 
-def load_labchart_file(filepath):
+    Returns (time, force) or None if the file does not fit the fast path.
+    """
+    skiprows, delimiter = _find_data_start(filepath)
+    if skiprows is None:
+        return None
+
+    read_options = pa_csv.ReadOptions(skip_rows=skiprows, autogenerate_column_names=True)
+    parse_options = pa_csv.ParseOptions(delimiter=delimiter)
+    convert_options = pa_csv.ConvertOptions(
+        column_types={'f0': pa.float64(), 'f1': pa.float64()})
+    try:
+        if max_seconds is None:
+            table = pa_csv.read_csv(filepath, read_options=read_options,
+                                    parse_options=parse_options,
+                                    convert_options=convert_options)
+        else:
+            batches = []
+            start = None
+            with pa_csv.open_csv(filepath, read_options=read_options,
+                                 parse_options=parse_options,
+                                 convert_options=convert_options) as reader:
+                for batch in reader:
+                    if batch.num_rows == 0:
+                        continue
+                    batches.append(batch)
+                    if start is None:
+                        start = batch.column(0)[0].as_py()
+                    last = batch.column(0)[-1].as_py()
+                    if start is not None and last is not None and last - start >= max_seconds:
+                        break
+            if not batches:
+                return None
+            table = pa.Table.from_batches(batches)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OSError):
+        return None
+
+    if table.num_columns < 2:
+        return None
+    time_col, force_col = table.column(0), table.column(1)
+    if time_col.null_count or force_col.null_count:
+        return None
+
+    time = time_col.to_numpy()
+    force = force_col.to_numpy()
+    if not _is_valid_trace(time):
+        return None
+    return time, force
+
+
+# numpy >= 1.23 parses text in C; older versions fall back to pandas' C reader
+_HAS_C_LOADTXT = np.lib.NumpyVersion(np.__version__) >= '1.23.0'
+
+
+def _load_sniffed(filepath):
+    """
+    Single-pass parse of the numeric block when pyarrow is not installed.
+
+    The header is located once with _find_data_start instead of retrying
+    every skiprows/delimiter pair. Parsed with np.loadtxt where numpy has
+    its C reader, otherwise with pandas' C engine; both give correctly
+    rounded values, identical to the trial-and-error loop.
+
+    Returns (time, force) or None if the file does not fit this path.
+    """
+    skiprows, delimiter = _find_data_start(filepath)
+    if skiprows is None:
+        return None
+
+    try:
+        if _HAS_C_LOADTXT:
+            data = np.loadtxt(filepath, delimiter=None if delimiter == ' ' else delimiter,
+                              skiprows=skiprows, usecols=(0, 1))
+            time = np.ascontiguousarray(data[:, 0])
+            force = np.ascontiguousarray(data[:, 1])
+        else:
+            df = pd.read_csv(filepath, sep=r'\s+' if delimiter == ' ' else delimiter,
+                             skiprows=skiprows, header=None, usecols=[0, 1],
+                             dtype=np.float64, engine='c', float_precision='round_trip')
+            time = df[0].to_numpy()
+            force = df[1].to_numpy()
+    except (ValueError, IndexError, pd.errors.ParserError, OSError):
+        return None
+
+    if np.isnan(time).any() or np.isnan(force).any() or not _is_valid_trace(time):
+        return None
+    return time, force
+
+
+def load_labchart_file(filepath, max_seconds=None):
     """
     Load a LabChart text export file.
 
     Attempts multiple parsing strategies to handle various LabChart export
-    formats (tab-delimited, comma-delimited, varying header rows).
+    formats (tab-delimited, comma-delimited, varying header rows). The
+    header is located once and the numeric block is parsed in a single pass
+    (pyarrow if installed, otherwise a single C-level text parse); the
+    trial-and-error loop is the fallback.
 
     Parameters
     ----------
     filepath : str or Path
         Path to LabChart .txt file
+    max_seconds : float, optional
+        Stop parsing once the trace covers this many seconds. Only the
+        pyarrow fast path stops early; the returned trace may be longer.
 
     Returns
     -------
     time : ndarray
-        Time values in seconds
+        Time values in seconds (C-contiguous float64)
     force : ndarray
-        Force values in mN
+        Force values in mN (C-contiguous float64)
 
     Raises
     ------
@@ -166,17 +393,26 @@ def load_labchart_file(filepath):
     """
     filepath = Path(filepath)
 
+    if HAS_PYARROW:
+        loaded = _load_with_pyarrow(filepath, max_seconds)
+        if loaded is not None:
+            return loaded
+    else:
+        loaded = _load_sniffed(filepath)
+        if loaded is not None:
+            return loaded
+
     # Try different delimiters and skip options (LabChart exports vary)
     for skiprows in [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]:
         for delimiter in ['\t', ',', ' ']:
             try:
                 data = np.loadtxt(filepath, delimiter=delimiter, skiprows=skiprows)
                 if data.ndim == 2 and data.shape[1] >= 2:
-                    time = data[:, 0]
-                    force = data[:, 1]
+                    time = np.ascontiguousarray(data[:, 0])
+                    force = np.ascontiguousarray(data[:, 1])
 
                     # Sanity checks
-                    if len(time) > 100 and np.all(np.diff(time) > 0):
+                    if _is_valid_trace(time):
                         return time, force
             except:
                 continue
@@ -184,8 +420,8 @@ def load_labchart_file(filepath):
     # If standard loading failed, try pandas
     try:
         df = pd.read_csv(filepath, sep='\t', header=None, skiprows=10)
-        time = df.iloc[:, 0].values
-        force = df.iloc[:, 1].values
+        time = df.iloc[:, 0].to_numpy(dtype=np.float64)
+        force = df.iloc[:, 1].to_numpy(dtype=np.float64)
         return time, force
     except:
         pass
@@ -193,7 +429,161 @@ def load_labchart_file(filepath):
     raise ValueError(f"Could not parse file: {filepath}")
 
 
-def extract_first_n_seconds(time, force, n_seconds):
+def trace_cache_path(filepath):
+    """Binary sidecar that caches the parsed trace of a LabChart export."""
+    filepath = Path(filepath)
+    return filepath.with_name(filepath.name + '.npy')
+
+
+def trace_stamp_path(filepath):
+    """Stamp recording which version of the .txt file the sidecar holds."""
+    filepath = Path(filepath)
+    return filepath.with_name(filepath.name + '.json')
+
+
+def _save_trace(sidecar, time, force, mtime_ns, size):
+    """
+    Write time and force as one (2, N) float64 .npy file, then its stamp.
+
+    Produces exactly the file np.save(sidecar, np.vstack([time, force]))
+    would, but streams the two rows after the header instead of first
+    stacking them into a third full-length array. The stamp holds the
+    source's mtime_ns and size; it is removed first and written last, so
+    a partly written sidecar is never taken as valid.
+    """
+    stamp = sidecar.with_suffix('.json')
+    stamp.unlink(missing_ok=True)
+    header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float64)),
+              'fortran_order': False, 'shape': (2, len(time))}
+    with open(sidecar, 'wb') as fh:
+        np.lib.format.write_array_header_1_0(fh, header)
+        np.ascontiguousarray(time, dtype=np.float64).tofile(fh)
+        np.ascontiguousarray(force, dtype=np.float64).tofile(fh)
+    stamp.write_text(json.dumps({'mtime_ns': mtime_ns, 'size': size}))
+
+
+def _trace_is_current(sidecar, mtime_ns, size):
+    """True if the sidecar's stamp matches the source's current mtime_ns and size."""
+    try:
+        stamp = json.loads(sidecar.with_suffix('.json').read_text())
+        return stamp['mtime_ns'] == mtime_ns and stamp['size'] == size
+    except (OSError, ValueError, TypeError, KeyError):
+        return False
+
+
+def load_trace(filepath, max_seconds=None):
+    """
+    Load a LabChart export, reusing the binary sidecar from a previous run.
+
+    The first load parses the .txt file and saves time and force as a
+    (2, N) float64 array next to it (``<name>.txt.npy``). Later loads read
+    the sidecar instead, as long as the .txt file still has the mtime and
+    size recorded with it (``<name>.txt.json``) and it covers the requested
+    window. Values are bit-identical to a fresh parse.
+    Repeated loads of an unchanged file (same mtime and size) within one
+    process return the same read-only arrays without re-reading the file.
+
+    With ``max_seconds``, parsing may stop once the window is covered; the
+    full recording duration is then taken from the last row of the file.
+
+    Parameters
+    ----------
+    filepath : str or Path
+        Path to LabChart .txt file
+    max_seconds : float, optional
+        Length of the analysis window in seconds (None = whole recording)
+
+    Returns
+    -------
+    time : ndarray
+        Time values in seconds (at least the first ``max_seconds``)
+    force : ndarray
+        Force values in mN
+    total_duration : float
+        Duration of the full recording in seconds
+    """
+    filepath = Path(filepath)
+    stat = filepath.stat()
+    return _load_trace_memo(filepath.resolve(), stat.st_mtime_ns, stat.st_size, max_seconds)
+
+
+# Traces kept in memory per process, for repeated loads of the same file
+# (interactive re-analysis); a batch run loads every file only once
+_TRACE_MEMO_SIZE = 4
+
+
+@lru_cache(maxsize=_TRACE_MEMO_SIZE)
+def _load_trace_memo(filepath, mtime_ns, size, max_seconds):
+    """
+    In-process memo of load_trace, keyed by the file's mtime and size.
+
+    The arrays are shared between callers, so they are returned read-only.
+    """
+    time, force, total_duration = _load_trace_uncached(filepath, mtime_ns, size, max_seconds)
+    time.setflags(write=False)
+    force.setflags(write=False)
+    return time, force, total_duration
+
+
+def _load_trace_uncached(filepath, mtime_ns, size, max_seconds=None):
+    """
+    load_trace without the in-process memo (sidecar or fresh parse).
+
+    ``mtime_ns`` and ``size`` are the source's stat from before parsing, so
+    a file changed mid-parse gets a stamp that no longer matches it.
+    """
+    sidecar = trace_cache_path(filepath)
+
+    # Only stop early when the true end of the recording is known
+    last_time = _last_data_time(filepath)
+    if last_time is None:
+        max_seconds = None
+
+    def duration(time):
+        if last_time is not None and time[-1] < last_time:
+            return last_time - time[0]  # Parsed only up to the window
+        return time[-1] - time[0]
+
+    try:
+        if _trace_is_current(sidecar, mtime_ns, size):
+            # Memory-mapped: pages come straight from the OS file cache
+            # instead of a private copy (rows are read-only, C-contiguous)
+            cached = np.load(sidecar, mmap_mode='r')
+            if cached.ndim == 2 and cached.shape[0] == 2 and _is_valid_trace(cached[0]):
+                time, force = cached[0], cached[1]
+                # Whole recording, or (if trimmed) at least the window
+                if (last_time is None or time[-1] >= last_time
+                        or (max_seconds is not None and time[-1] - time[0] >= max_seconds)):
+                    return time, force, duration(time)
+    except (OSError, ValueError, TypeError):
+        pass  # No usable sidecar -- parse the text file
+
+    cached = None  # Drop any mapping before the sidecar is rewritten
+    time, force = load_labchart_file(filepath, max_seconds)
+
+    try:
+        _save_trace(sidecar, time, force, mtime_ns, size)
+    except OSError:
+        pass  # Read-only input folder: caching is best-effort
+    return time, force, duration(time)
+
+
+def _recording_samples(time, total_duration):
+    """
+    Number of samples in the whole recording.
+
+    load_trace may stop parsing once the analysis window is covered; the
+    count of the unparsed rest is then derived from total_duration at the
+    sample interval of the parsed part.
+    """
+    n = len(time)
+    if n < 2 or time[-1] - time[0] >= total_duration:
+        return n
+    interval = (time[-1] - time[0]) / (n - 1)
+    return int(round(total_duration / interval)) + 1
+
+
+def extract_first_n_seconds(time, force, n_seconds, total_duration=None):
     """
     Extract the first N seconds of data for standardized analysis.
 
@@ -207,6 +597,9 @@ def extract_first_n_seconds(time, force, n_seconds):
         Force values
     n_seconds : float
         Number of seconds to extract
+    total_duration : float, optional
+        Duration of the full recording, if the trace was only parsed up to
+        the window (see load_trace). Defaults to the span of ``time``.
 
     Returns
     -------
@@ -217,18 +610,47 @@ def extract_first_n_seconds(time, force, n_seconds):
     total_duration : float
         Total duration of original recording
     """
-    # Normalize time to start at 0
-    time_normalized = time - time[0]
-    total_duration = time_normalized[-1]
+    t0 = time[0]
+    if total_duration is None:
+        total_duration = time[-1] - t0
 
+    # Normalize time to start at 0
     if total_duration <= n_seconds:
-        return time_normalized, force, total_duration
+        return time - t0, force, total_duration
 
+    # Only the window is normalized. The raw search can land a sample off
+    # from the normalized one through rounding, so a little slack is
+    # normalized too and the cut is made on the normalized values.
+    stop = min(len(time), np.searchsorted(time, t0 + n_seconds) + 2)
+    time_normalized = time[:stop] - t0
     end_idx = np.searchsorted(time_normalized, n_seconds)
+    if end_idx == stop < len(time):
+        time_normalized = time - t0
+        end_idx = np.searchsorted(time_normalized, n_seconds)
     return time_normalized[:end_idx], force[:end_idx], total_duration
 
 
-def detect_contractions(time, force):
+def _percentile_10(force):
+    """
+    np.percentile(force, 10) from a single two-point selection.
+
+    Same linear interpolation between the two neighbouring order statistics
+    (and the same rounding) as NumPy's default method, without the generic
+    quantile machinery, which costs several times the selection itself.
+    """
+    index = (force.size - 1) * 0.1
+    lo = int(index)
+    hi = min(lo + 1, force.size - 1)
+    ordered = np.partition(force, [lo, hi])
+    below, above = ordered[lo], ordered[hi]
+    gamma = index - lo
+    step = above - below
+    if gamma >= 0.5:
+        return above - step * (1 - gamma)
+    return below + step * gamma
+
+
+def detect_contractions(time, force, config=None):
     """
     Detect contractions using fixed, reproducible parameters.
 
@@ -248,6 +670,8 @@ def detect_contractions(time, force):
         Time values in seconds (should start at 0)
     force : ndarray
         Force values in mN
+    config : Config, optional
+        Detection parameters (defaults to the module settings)
 
     Returns
     -------
@@ -258,25 +682,249 @@ def detect_contractions(time, force):
     baseline : float
         Estimated baseline force level (10th percentile, mN)
     """
+    config = config or Config()
+
+    # scipy.signal costs ~0.3 s to import, so it is loaded on first use
+    # (pool workers preload it in _init_worker). A numba port of find_peaks
+    # was benchmarked and dropped: on a 150 s, 250 Hz trace both take
+    # ~0.6-0.8 ms, about half of it in the whole-trace prominence search
+    # that any exact implementation has to do.
+    from scipy.signal import find_peaks
+
     # Calculate baseline as 10th percentile (robust to peaks)
-    baseline = np.percentile(force, 10)
+    baseline = _percentile_10(force)
 
     # Subtract baseline for peak detection
     force_adjusted = force - baseline
 
-    # Detect peaks with fixed parameters (all criteria must be met)
+    # Flat / no-signal trace: baseline >= min, so if the whole range is below
+    # PEAK_HEIGHT no sample can clear the height criterion. Scanning an empty
+    # slice returns the same empty peaks/properties without the full pass.
+    if np.ptp(force) < config.peak_height:
+        force_adjusted = force_adjusted[:0]
+
+    # Detect peaks with fixed parameters (all criteria must be met).
+    # find_peaks already applies the criteria in increasing cost order
+    # (height -> distance -> prominence -> width) and only computes
+    # prominences/widths for the candidates that survive the cheaper
+    # filters, so a single call is also the fastest form.
+    wlen = int(config.prominence_wlen_sec * SAMPLING_RATE) if config.prominence_wlen_sec else None
     peaks, properties = find_peaks(
         force_adjusted,
-        height=PEAK_HEIGHT,
-        prominence=PEAK_PROMINENCE,
-        distance=PEAK_DISTANCE,
-        width=PEAK_WIDTH,
+        height=config.peak_height,
+        prominence=config.peak_prominence,
+        distance=config.peak_distance,
+        width=config.peak_width,
+        wlen=wlen,
         rel_height=0.5  # For width-at-half-maximum calculation
     )
 
     return peaks, properties, baseline
 
 
+def _boundary_kernel(force, peaks, baseline, pre_samples, post_samples):
+    """
+    Start/end sample of each contraction in a single bounded scan per peak.
+
+    Same definitions as _boundaries_numpy, but each 10% crossing is found
+    with a forward scan that stops at the first hit instead of building
+    np.where index arrays. Compiled with numba when available.
+
+    Returns
+    -------
+    starts, ends : ndarray of int64, one value per peak
+    """
+    n_peaks = peaks.shape[0]
+    n_samples = force.shape[0]
+    starts = np.empty(n_peaks, dtype=np.int64)
+    ends = np.empty(n_peaks, dtype=np.int64)
+
+    for i in range(n_peaks):
+        peak_idx = peaks[i]
+        amp = force[peak_idx] - baseline
+        threshold_10pct = baseline + 0.1 * amp
+
+        # START: first sample at/above threshold in the window before peak
+        search_start_idx = max(0, peak_idx - pre_samples)
+        starts[i] = search_start_idx  # default fallback
+        if peak_idx - search_start_idx > 10:
+            j = search_start_idx
+            while j < peak_idx and not force[j] >= threshold_10pct:
+                j += 1
+            if j < peak_idx:
+                starts[i] = j
+
+        # END: first sample at/below threshold in the window after peak
+        search_end_idx = min(n_samples, peak_idx + post_samples)
+        ends[i] = search_end_idx - 1  # default fallback
+        if search_end_idx - peak_idx > 10:
+            j = peak_idx
+            while j < search_end_idx and not force[j] <= threshold_10pct:
+                j += 1
+            if j < search_end_idx:
+                ends[i] = j
+
+    return starts, ends
+
+
+if HAS_NUMBA:
+    _boundary_kernel = njit(cache=True, nogil=True)(_boundary_kernel)
+
+
+def _first_true(mask):
+    """
+    Index of the first True in a boolean array, or -1 if there is none.
+
+    np.argmax stops at the first True of a boolean array, so this avoids
+    building the full index array of np.where(mask)[0] just to take [0].
+    """
+    if len(mask) == 0:
+        return -1
+    idx = int(np.argmax(mask))
+    return idx if mask[idx] else -1
+
+
+def _velocity_kernel(force, peaks, starts, ends, dt_step):
+    """
+    Steepest rise (start -> peak) and fall (peak -> end) of each contraction.
+
+    Evaluates np.gradient(force, dt_step) only inside each contraction,
+    with the same central/one-sided differences and rounding, instead of
+    materializing the derivative of the whole trace. Compiled with numba
+    when available.
+
+    Returns
+    -------
+    dF_dt_max, dF_dt_min : ndarray of float64, one value per peak
+    """
+    n_peaks = peaks.shape[0]
+    last = force.shape[0] - 1
+    two_dt = 2.0 * dt_step
+    dF_dt_max = np.zeros(n_peaks)
+    dF_dt_min = np.zeros(n_peaks)
+
+    for i in range(n_peaks):
+        peak_idx = peaks[i]
+        for j in range(starts[i], ends[i] + 1):
+            if j == 0:
+                d = (force[1] - force[0]) / dt_step
+            elif j == last:
+                d = (force[last] - force[last - 1]) / dt_step
+            else:
+                d = (force[j + 1] - force[j - 1]) / two_dt
+            if j <= peak_idx and (j == starts[i] or d > dF_dt_max[i]):
+                dF_dt_max[i] = d
+            if j >= peak_idx and (j == peak_idx or d < dF_dt_min[i]):
+                dF_dt_min[i] = d
+
+    return dF_dt_max, dF_dt_min
+
+
+if HAS_NUMBA:
+    _velocity_kernel = njit(cache=True, nogil=True)(_velocity_kernel)
+
+
+def _boundaries_numpy(time, force, peaks, baseline, max_search_samples):
+    """NumPy path for contraction start/end samples (used without numba)."""
+    n_peaks = len(peaks)
+    contraction_starts = np.empty(n_peaks, dtype=np.int64)
+    contraction_ends = np.empty(n_peaks, dtype=np.int64)
+
+    # Per-peak 10% thresholds in one vectorized pass
+    thresholds_10pct = baseline + 0.1 * (force[peaks] - baseline)
+
+    for i, (peak_idx, threshold_10pct) in enumerate(zip(peaks, thresholds_10pct)):
+        # Find contraction START (searching backward from peak)
+        search_start_idx = max(0, peak_idx - _PRE_PEAK_SAMPLES)  # 1 sec before
+        pre_peak = force[search_start_idx:peak_idx]
+
+        start_idx = search_start_idx  # default fallback
+        if len(pre_peak) > 10:
+            first_above = _first_true(pre_peak >= threshold_10pct)
+            if first_above >= 0:
+                start_idx = first_above + search_start_idx
+
+        # Find contraction END (searching forward from peak)
+        search_end_idx = min(len(force), peak_idx + max_search_samples)
+        post_peak = force[peak_idx:search_end_idx]
+
+        end_idx = search_end_idx - 1  # default fallback
+        if len(post_peak) > 10:
+            first_below = _first_true(post_peak <= threshold_10pct)
+            if first_below >= 0:
+                end_idx = first_below + peak_idx
+
+        contraction_starts[i] = start_idx
+        contraction_ends[i] = end_idx
+
+    contraction_durations = time[contraction_ends] - time[contraction_starts]
+
+    return contraction_starts, contraction_ends, contraction_durations
+
+
+def _segment_mean(cumsum, begins, stops, default):
+    """
+    Mean of the samples in the slices [begins[i], stops[i]) taken together.
+
+    ``cumsum`` is the cumulative sum of the trace with a leading 0, so each
+    slice sum is a difference of two entries. Returns ``default`` if the
+    slices contain no samples.
+    """
+    n_samples = np.sum(stops - begins)
+    if n_samples == 0:
+        return default
+    return np.sum(cumsum[stops] - cumsum[begins]) / n_samples
+
+
+def _intercontraction_intervals(time, contraction_starts, contraction_ends):
+    """
+    Gaps between consecutive contractions and which of them overlap.
+
+    Returns
+    -------
+    intercontraction_intervals : ndarray
+        End of each contraction to start of the next (0 where they overlap)
+    incomplete_relaxation : ndarray of bool
+        True where the next contraction starts before this one has ended;
+        one entry per contraction when there are at least two (the last
+        one cannot be determined and is False), otherwise empty
+    """
+    gaps = time[contraction_starts[1:]] - time[contraction_ends[:-1]]
+    overlapping = gaps < 0
+    intercontraction_intervals = np.where(overlapping, 0.0, gaps)
+
+    if len(contraction_ends) > 1:
+        # Cannot determine for last
+        incomplete_relaxation = np.append(overlapping, False)
+    else:
+        incomplete_relaxation = np.zeros(0, dtype=bool)
+
+    return intercontraction_intervals, incomplete_relaxation
+
+
+def _duty_cycle(time, contraction_starts, contraction_ends):
+    """
+    Time spent contracting, as the union of the contraction intervals.
+
+    Returns (total_contraction_time, duty_cycle_percent); the percentage is
+    relative to the whole span of ``time`` and capped at 100.
+    """
+    total_recording_time = time[-1] - time[0]
+    if len(contraction_starts) > 0:
+        intervals = sorted(zip(contraction_starts, contraction_ends), key=lambda x: x[0])
+        merged = [list(intervals[0])]
+        for s, e in intervals[1:]:
+            if s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        total_contraction_time = sum(time[e] - time[s] for s, e in merged)
+    else:
+        total_contraction_time = 0
+    duty_cycle_percent = min((total_contraction_time / total_recording_time * 100) if total_recording_time > 0 else 0, 100.0)
+    return total_contraction_time, duty_cycle_percent
+
+
 def detect_contraction_boundaries(time, force, peaks, baseline):
     """
     Detect start and end boundaries of each contraction.
@@ -320,116 +968,71 @@ def detect_contraction_boundaries(time, force, peaks, baseline):
             'dF_dt_min': np.array([])
         }
 
-    contraction_starts = []
-    contraction_ends = []
-    contraction_durations = []
-
-    max_search_samples = int(1.5 * SAMPLING_RATE)  # 1.5 sec search window
-
-    for peak_idx in peaks:
-        amp = force[peak_idx] - baseline
-        threshold_10pct = baseline + 0.1 * amp
+    max_search_samples = _BOUNDARY_SEARCH_SAMPLES  # 1.5 sec search window
 
-        # Find contraction START (searching backward from peak)
-        search_start_idx = max(0, peak_idx - SAMPLING_RATE)  # 1 sec before
-        pre_peak = force[search_start_idx:peak_idx]
-
-        start_idx = search_start_idx  # default fallback
-        if len(pre_peak) > 10:
-            above_threshold = np.where(pre_peak >= threshold_10pct)[0]
-            if len(above_threshold) > 0:
-                start_idx = above_threshold[0] + search_start_idx
-
-        # Find contraction END (searching forward from peak)
-        search_end_idx = min(len(force), peak_idx + max_search_samples)
-        post_peak = force[peak_idx:search_end_idx]
-
-        end_idx = search_end_idx - 1  # default fallback
-        if len(post_peak) > 10:
-            below_threshold = np.where(post_peak <= threshold_10pct)[0]
-            if len(below_threshold) > 0:
-                end_idx = below_threshold[0] + peak_idx
-
-        duration = time[end_idx] - time[start_idx]
-        contraction_starts.append(start_idx)
-        contraction_ends.append(end_idx)
-        contraction_durations.append(duration)
-
-    contraction_starts = np.array(contraction_starts)
-    contraction_ends = np.array(contraction_ends)
-    contraction_durations = np.array(contraction_durations)
+    if HAS_NUMBA:
+        contraction_starts, contraction_ends = _boundary_kernel(
+            np.ascontiguousarray(force, dtype=np.float64),
+            np.asarray(peaks, dtype=np.int64),
+            float(baseline), _PRE_PEAK_SAMPLES, max_search_samples
+        )
+        contraction_durations = time[contraction_ends] - time[contraction_starts]
+    else:
+        contraction_starts, contraction_ends, contraction_durations = \
+            _boundaries_numpy(time, force, peaks, baseline, max_search_samples)
 
     # dF/dt_max and dF/dt_min (v4.0 - peak instantaneous velocity)
     dt_step = np.mean(np.diff(time))
-    force_deriv = np.gradient(force, dt_step)
-    dF_dt_max_vals = []
-    dF_dt_min_vals = []
-    for i, peak_idx in enumerate(peaks):
-        s = contraction_starts[i]
-        e = contraction_ends[i]
-        rise_win = force_deriv[s:peak_idx + 1]
-        fall_win = force_deriv[peak_idx:e + 1]
-        dF_dt_max_vals.append(float(np.max(rise_win)) if len(rise_win) > 0 else 0.0)
-        dF_dt_min_vals.append(float(np.min(fall_win)) if len(fall_win) > 0 else 0.0)
+    if HAS_NUMBA:
+        dF_dt_max_vals, dF_dt_min_vals = _velocity_kernel(
+            np.ascontiguousarray(force, dtype=np.float64),
+            np.asarray(peaks, dtype=np.int64),
+            contraction_starts, contraction_ends, float(dt_step)
+        )
+    else:
+        force_deriv = np.gradient(force, dt_step)
+        dF_dt_max_vals = np.zeros(len(peaks))
+        dF_dt_min_vals = np.zeros(len(peaks))
+        for i, peak_idx in enumerate(peaks):
+            s = contraction_starts[i]
+            e = contraction_ends[i]
+            rise_win = force_deriv[s:peak_idx + 1]
+            fall_win = force_deriv[peak_idx:e + 1]
+            if len(rise_win) > 0:
+                dF_dt_max_vals[i] = np.max(rise_win)
+            if len(fall_win) > 0:
+                dF_dt_min_vals[i] = np.min(fall_win)
 
     # Inter-contraction intervals and overlap detection
-    intercontraction_intervals = []
-    incomplete_relaxation = []
-
-    for i in range(len(contraction_ends) - 1):
-        interval = time[contraction_starts[i + 1]] - time[contraction_ends[i]]
-        if interval < 0:
-            intercontraction_intervals.append(0)
-            incomplete_relaxation.append(True)
-        else:
-            intercontraction_intervals.append(interval)
-            incomplete_relaxation.append(False)
-
-    if len(peaks) > 1:
-        incomplete_relaxation.append(False)  # Cannot determine for last
-
-    intercontraction_intervals = np.array(intercontraction_intervals)
-    incomplete_relaxation = np.array(incomplete_relaxation, dtype=bool)
+    intercontraction_intervals, incomplete_relaxation = \
+        _intercontraction_intervals(time, contraction_starts, contraction_ends)
 
     # Duty cycle - UNION OF INTERVALS (v4.0 fix for >100% bug)
     total_recording_time = time[-1] - time[0]
-    if len(contraction_starts) > 0:
-        intervals = sorted(zip(contraction_starts, contraction_ends), key=lambda x: x[0])
-        merged = [list(intervals[0])]
-        for s, e in intervals[1:]:
-            if s <= merged[-1][1]:
-                merged[-1][1] = max(merged[-1][1], e)
-            else:
-                merged.append([s, e])
-        total_contraction_time = sum(time[e] - time[s] for s, e in merged)
-    else:
-        total_contraction_time = 0
+    total_contraction_time, duty_cycle_percent = \
+        _duty_cycle(time, contraction_starts, contraction_ends)
     total_quiescent_time = max(0, total_recording_time - total_contraction_time)
-    duty_cycle_percent = min((total_contraction_time / total_recording_time * 100) if total_recording_time > 0 else 0, 100.0)
 
     # Tonic metrics
     n_incomplete = int(np.sum(incomplete_relaxation)) if len(incomplete_relaxation) > 0 else 0
     percent_incomplete = (n_incomplete / len(incomplete_relaxation) * 100) if len(incomplete_relaxation) > 0 else 0
 
-    # Mean quiescent tone
-    quiescent_samples = []
-    for i in range(len(contraction_ends) - 1):
-        if not incomplete_relaxation[i]:
-            e = contraction_ends[i]
-            s = contraction_starts[i + 1]
-            if s > e:
-                quiescent_samples.extend(force[e:s])
-    mean_quiescent_tone = np.mean(quiescent_samples) if quiescent_samples else baseline
-
-    # Mean tonic force
-    tonic_samples = []
-    for i in range(len(contraction_ends) - 1):
-        if incomplete_relaxation[i]:
-            e = contraction_ends[i]
-            s = contraction_starts[i + 1]
-            if s < e:
-                tonic_samples.extend(force[s:e])
-    mean_tonic_force = np.mean(tonic_samples) if tonic_samples else baseline
+    # Mean quiescent tone / mean tonic force: the force between consecutive
+    # contractions (end -> next start when relaxed, next start -> end when
+    # overlapping). Segment sums come from one cumulative sum instead of
+    # copying every sample into a list.
+    ends_prev = contraction_ends[:-1]
+    starts_next = contraction_starts[1:]
+    overlap = incomplete_relaxation[:len(ends_prev)]
+    force_cumsum = np.concatenate(([0.0], np.cumsum(force)))
+
+    quiescent = ~overlap & (starts_next > ends_prev)
+    mean_quiescent_tone = _segment_mean(force_cumsum, ends_prev[quiescent],
+                                        starts_next[quiescent], baseline)
+
+    tonic = overlap & (starts_next < ends_prev)
+    mean_tonic_force = _segment_mean(force_cumsum, starts_next[tonic],
+                                     ends_prev[tonic], baseline)
 
     n_complete = len(incomplete_relaxation) - n_incomplete if len(incomplete_relaxation) > 0 else 0
     phasic_tonic_ratio = (n_complete / n_incomplete) if n_incomplete > 0 else float(n_complete)
@@ -448,52 +1051,46 @@ def detect_contraction_boundaries(time, force, peaks, baseline):
         'mean_quiescent_tone': mean_quiescent_tone,
         'mean_tonic_force': mean_tonic_force,
         'phasic_tonic_ratio': phasic_tonic_ratio,
-        'dF_dt_max': np.array(dF_dt_max_vals),
-        'dF_dt_min': np.array(dF_dt_min_vals)
+        'dF_dt_max': dF_dt_max_vals,
+        'dF_dt_min': dF_dt_min_vals
     }
 
 
-def calculate_rise_relax_metrics(time, force, peaks, baseline):
-    """
-    Calculate rise and relaxation kinetics for each contraction.
+_KINETICS_KEYS = ('rise_times', 'relax_times', 'rise_rates', 'relax_rates',
+                  'times_to_peak', 'times_from_peak', 'rise_fall_ratios')
 
-    Rise time: 10% to 90% of peak amplitude (ascending phase)
-    Relax time: 90% to 10% of peak amplitude (descending phase)
-    Rates: 0.8 * amplitude / time (represents 80% of the excursion)
+# Per-peak kinetics as parallel float64 arrays (one entry per peak, NaN where
+# the metric is undefined for that peak)
+PeakKinetics = namedtuple('PeakKinetics', _KINETICS_KEYS)
 
-    Also calculates waveform shape metrics:
-    - Time to Peak: from 10% onset to peak maximum
-    - Time from Peak: from peak maximum to 10% return
-    - Rise/Fall Ratio: Time_to_Peak / Time_from_Peak
-      (1.0 = symmetric, <1.0 = faster rise than fall)
 
-    Parameters
-    ----------
-    time : ndarray
-        Time values
-    force : ndarray
-        Force values
-    peaks : ndarray
-        Peak indices (must be valid indices into time and force arrays)
-    baseline : float
-        Baseline force level
+def _rise_relax_kernel(time, force, peaks, baseline, pre_samples, post_samples):
+    """
+    Per-peak rise/relaxation kinetics in a single bounded scan per peak.
+
+    Same definitions as _rise_relax_numpy, but
+    each threshold crossing is found with a forward scan that stops at the
+    first hit instead of building np.where index arrays. Compiled with
+    numba when available.
 
     Returns
     -------
-    dict with keys:
-        rise_times, relax_times, rise_rates, relax_rates,
-        times_to_peak, times_from_peak, rise_fall_ratios
+    tuple of 7 ndarrays, one value per peak in _KINETICS_KEYS order
+        NaN where the metric is undefined for that peak.
     """
-    rise_times = []
-    relax_times = []
-    rise_rates = []
-    relax_rates = []
-    times_to_peak = []
-    times_from_peak = []
-    rise_fall_ratios = []
-
-    for peak_idx in peaks:
-        if peak_idx >= len(force):
+    n_peaks = peaks.shape[0]
+    n_samples = force.shape[0]
+    rise_times = np.full(n_peaks, np.nan)
+    relax_times = np.full(n_peaks, np.nan)
+    rise_rates = np.full(n_peaks, np.nan)
+    relax_rates = np.full(n_peaks, np.nan)
+    times_to_peak = np.full(n_peaks, np.nan)
+    times_from_peak = np.full(n_peaks, np.nan)
+    rise_fall_ratios = np.full(n_peaks, np.nan)
+
+    for i in range(n_peaks):
+        peak_idx = peaks[i]
+        if peak_idx >= n_samples:
             continue
 
         amp = force[peak_idx] - baseline
@@ -503,77 +1100,192 @@ def calculate_rise_relax_metrics(time, force, peaks, baseline):
         rise_10 = baseline + 0.1 * amp
         rise_90 = baseline + 0.9 * amp
 
+        # Rise: first samples at/above 10% and 90% in the window before peak
+        search_start = max(0, peak_idx - pre_samples)
+        onset_idx = -1
+        if peak_idx - search_start > 10:
+            j = search_start
+            while j < peak_idx and not force[j] >= rise_10:
+                j += 1
+            if j < peak_idx:
+                onset_idx = j
+                # Nothing before the 10% crossing can be above 90%
+                k = j
+                while k < peak_idx and not force[k] >= rise_90:
+                    k += 1
+                if k < peak_idx and onset_idx < k:
+                    rt = time[k] - time[onset_idx]
+                    if rt > 0:
+                        rise_times[i] = rt
+                        rise_rates[i] = 0.8 * amp / rt
+
+        # Relaxation: first sample at/below 90%, then first sample at/below
+        # 10% strictly after it (window after peak)
+        search_end = min(n_samples, peak_idx + post_samples)
+        offset_idx = -1
+        if search_end - peak_idx > 10:
+            j = peak_idx
+            while j < search_end and not force[j] <= rise_90:
+                j += 1
+            if j < search_end:
+                # At/below 10% implies at/below 90%, so start at j
+                first_10 = j
+                while first_10 < search_end and not force[first_10] <= rise_10:
+                    first_10 += 1
+                if first_10 < search_end:
+                    k = first_10
+                    if k == j:
+                        k += 1
+                        while k < search_end and not force[k] <= rise_10:
+                            k += 1
+                    if k < search_end:
+                        offset_idx = k
+                        rxt = time[k] - time[j]
+                        if rxt > 0:
+                            relax_times[i] = rxt
+                            relax_rates[i] = 0.8 * amp / rxt
+                    else:
+                        # Only crossing coincides with the 90% crossing
+                        offset_idx = first_10
+
+        # Waveform shape
+        if onset_idx >= 0:
+            ttp = time[peak_idx] - time[onset_idx]
+            if ttp > 0:
+                times_to_peak[i] = ttp
+                if offset_idx >= 0:
+                    tfp = time[offset_idx] - time[peak_idx]
+                    if tfp > 0:
+                        times_from_peak[i] = tfp
+                        rise_fall_ratios[i] = ttp / tfp
+
+    return (rise_times, relax_times, rise_rates, relax_rates,
+            times_to_peak, times_from_peak, rise_fall_ratios)
+
+
+if HAS_NUMBA:
+    # Every division is guarded by a > 0 check, so numba's own zero-division
+    # test (error_model='python') is dead weight in the loop
+    _rise_relax_kernel = njit(cache=True, nogil=True, error_model='numpy')(_rise_relax_kernel)
+
+
+def _warm_up_kernels():
+    """
+    Compile (or load from numba's on-disk cache) the JIT kernels up front.
+
+    Called from the worker initializer so the ~0.1-1 s first-call cost is
+    paid while the pool starts rather than inside the first file's timing.
+    Uses the same argument types as the real calls so the warmed
+    specializations are the ones that get reused: force is writable after
+    a fresh parse and read-only when memory-mapped from the trace cache.
+    """
+    if not HAS_NUMBA:
+        return
+    time = np.arange(3 * SAMPLING_RATE, dtype=np.float64) / SAMPLING_RATE
+    peaks = np.array([_BOUNDARY_SEARCH_SAMPLES], dtype=np.int64)
+    for writeable in (True, False):
+        force = np.exp(-((time - 1.5) ** 2) * 4.0)
+        force.setflags(write=writeable)
+        _rise_relax_kernel(time, force, peaks, 0.0, _PRE_PEAK_SAMPLES, _RELAX_SEARCH_SAMPLES)
+        starts, ends = _boundary_kernel(force, peaks, 0.0, _PRE_PEAK_SAMPLES,
+                                        _BOUNDARY_SEARCH_SAMPLES)
+        _velocity_kernel(force, peaks, starts, ends, 1.0 / SAMPLING_RATE)
+        _integral_areas_kernel(time, force, 0.0)
+
+
+def _rise_relax_numpy(time, force, peaks, baseline):
+    """
+    NumPy path for per-peak rise/relaxation kinetics (used without numba).
+
+    Returns
+    -------
+    tuple of 7 ndarrays, one value per peak in _KINETICS_KEYS order
+        NaN where the metric is undefined for that peak.
+    """
+    n_peaks = len(peaks)
+    rise_times = np.full(n_peaks, np.nan)
+    relax_times = np.full(n_peaks, np.nan)
+    rise_rates = np.full(n_peaks, np.nan)
+    relax_rates = np.full(n_peaks, np.nan)
+    times_to_peak = np.full(n_peaks, np.nan)
+    times_from_peak = np.full(n_peaks, np.nan)
+    rise_fall_ratios = np.full(n_peaks, np.nan)
+
+    # Per-peak amplitudes and 10%/90% thresholds in one vectorized pass;
+    # only peaks inside the trace with a positive amplitude are measured
+    peaks = np.asarray(peaks, dtype=np.int64)
+    in_trace = peaks < len(force)
+    amps = np.zeros(n_peaks)
+    amps[in_trace] = force[peaks[in_trace]] - baseline
+    thresholds_10 = baseline + 0.1 * amps
+    thresholds_90 = baseline + 0.9 * amps
+
+    for i in np.flatnonzero(amps > 0):
+        peak_idx = peaks[i]
+        amp = amps[i]
+        rise_10 = thresholds_10[i]
+        rise_90 = thresholds_90[i]
+
         # ============================================================
         # RISE KINETICS (search 1 sec before peak)
         # ============================================================
-        search_start = max(0, peak_idx - SAMPLING_RATE)
+        search_start = max(0, peak_idx - _PRE_PEAK_SAMPLES)
         pre_peak = force[search_start:peak_idx]
 
         onset_idx = None  # 10% crossing (for Time_to_Peak)
 
         if len(pre_peak) > 10:
-            try:
-                idx_10_candidates = np.where(pre_peak >= rise_10)[0]
-                idx_90_candidates = np.where(pre_peak >= rise_90)[0]
-                if len(idx_10_candidates) > 0:
-                    # First crossing above 10% = contraction onset
-                    onset_idx = idx_10_candidates[0] + search_start
-
-                    if len(idx_90_candidates) > 0:
-                        # FIX: Use [0] = FIRST crossing above 90%
-                        # (not [-1] which was last sample above 90%,
-                        # i.e. near peak, inflating rise time by ~48%)
-                        idx_90 = idx_90_candidates[0] + search_start
-
-                        if onset_idx < idx_90:
-                            rt = time[idx_90] - time[onset_idx]
-                            if rt > 0:
-                                rise_times.append(rt)
-                                rise_rates.append(0.8 * amp / rt)
-            except (IndexError, ValueError):
-                pass
+            first_10 = _first_true(pre_peak >= rise_10)
+            if first_10 >= 0:
+                # First crossing above 10% = contraction onset
+                onset_idx = first_10 + search_start
+
+                # FIX: Use FIRST crossing above 90%
+                # (not the last sample above 90%, i.e. near peak,
+                # which inflated rise time by ~48%)
+                first_90 = _first_true(pre_peak >= rise_90)
+                if first_90 >= 0:
+                    idx_90 = first_90 + search_start
+
+                    if onset_idx < idx_90:
+                        rt = time[idx_90] - time[onset_idx]
+                        if rt > 0:
+                            rise_times[i] = rt
+                            rise_rates[i] = 0.8 * amp / rt
 
         # ============================================================
         # RELAXATION KINETICS (search 2 sec after peak)
         # ============================================================
-        search_end = min(len(force), peak_idx + 2 * SAMPLING_RATE)
+        search_end = min(len(force), peak_idx + _RELAX_SEARCH_SAMPLES)
         post_peak = force[peak_idx:search_end]
 
         offset_idx = None  # 10% crossing on fall (for Time_from_Peak)
 
         if len(post_peak) > 10:
-            try:
-                idx_90_candidates = np.where(post_peak <= rise_90)[0]
-                idx_10_candidates = np.where(post_peak <= rise_10)[0]
-                if len(idx_90_candidates) > 0 and len(idx_10_candidates) > 0:
-                    # First crossing below 90% after peak (correct)
-                    idx_90_rel = idx_90_candidates[0]
-                    idx_90 = idx_90_rel + peak_idx
-
-                    # FIX: First crossing below 10% AFTER the 90% crossing
-                    # (not [-1] which grabbed end of 2-sec window,
-                    # inflating relax time by ~452%)
-                    after_90_mask = idx_10_candidates > idx_90_rel
-                    if np.any(after_90_mask):
-                        idx_10 = idx_10_candidates[after_90_mask][0] + peak_idx
-                        offset_idx = idx_10  # For Time_from_Peak
-
-                        if idx_90 < idx_10:
-                            rxt = time[idx_10] - time[idx_90]
-                            if rxt > 0:
-                                relax_times.append(rxt)
-                                relax_rates.append(0.8 * amp / rxt)
-                    elif len(idx_10_candidates) > 0:
-                        # Fallback: first crossing below 10% in window
-                        idx_10 = idx_10_candidates[0] + peak_idx
-                        offset_idx = idx_10
-                        if idx_90 < idx_10:
-                            rxt = time[idx_10] - time[idx_90]
-                            if rxt > 0:
-                                relax_times.append(rxt)
-                                relax_rates.append(0.8 * amp / rxt)
-            except (IndexError, ValueError):
-                pass
+            below_10 = post_peak <= rise_10
+            idx_90_rel = _first_true(post_peak <= rise_90)
+            first_10 = _first_true(below_10)
+            if idx_90_rel >= 0 and first_10 >= 0:
+                # First crossing below 90% after peak (correct)
+                idx_90 = idx_90_rel + peak_idx
+
+                # FIX: First crossing below 10% AFTER the 90% crossing
+                # (not the last one, which grabbed end of 2-sec window,
+                # inflating relax time by ~452%)
+                after_90 = _first_true(below_10[idx_90_rel + 1:])
+                if after_90 >= 0:
+                    idx_10 = after_90 + idx_90_rel + 1 + peak_idx
+                    offset_idx = idx_10  # For Time_from_Peak
+
+                    if idx_90 < idx_10:
+                        rxt = time[idx_10] - time[idx_90]
+                        if rxt > 0:
+                            relax_times[i] = rxt
+                            relax_rates[i] = 0.8 * amp / rxt
+                else:
+                    # Fallback: first crossing below 10% in window (at or
+                    # before the 90% crossing, so no relaxation time)
+                    offset_idx = first_10 + peak_idx
 
         # ============================================================
         # WAVEFORM SHAPE METRICS
@@ -582,27 +1294,123 @@ def calculate_rise_relax_metrics(time, force, peaks, baseline):
         if onset_idx is not None:
             ttp = time[peak_idx] - time[onset_idx]
             if ttp > 0:
-                times_to_peak.append(ttp)
+                times_to_peak[i] = ttp
 
                 # Time from Peak: peak to 10% return
                 if offset_idx is not None:
                     tfp = time[offset_idx] - time[peak_idx]
                     if tfp > 0:
-                        times_from_peak.append(tfp)
-                        rise_fall_ratios.append(ttp / tfp)
+                        times_from_peak[i] = tfp
+                        rise_fall_ratios[i] = ttp / tfp
 
-    return {
-        'rise_times': rise_times,
-        'relax_times': relax_times,
-        'rise_rates': rise_rates,
-        'relax_rates': relax_rates,
-        'times_to_peak': times_to_peak,
-        'times_from_peak': times_from_peak,
-        'rise_fall_ratios': rise_fall_ratios
-    }
+    return (rise_times, relax_times, rise_rates, relax_rates,
+            times_to_peak, times_from_peak, rise_fall_ratios)
+
+
+def per_peak_kinetics(time, force, peaks, baseline):
+    """
+    Rise/relaxation kinetics for every peak, as a PeakKinetics of arrays.
+
+    Each field has one entry per peak (aligned with ``peaks``) and is NaN
+    where that metric is undefined for the peak, so results can be indexed
+    or masked per peak without rebuilding lists.
+    """
+    if HAS_NUMBA:
+        return PeakKinetics(*_rise_relax_kernel(
+            np.ascontiguousarray(time, dtype=np.float64),
+            np.ascontiguousarray(force, dtype=np.float64),
+            np.asarray(peaks, dtype=np.int64),
+            float(baseline), _PRE_PEAK_SAMPLES, _RELAX_SEARCH_SAMPLES
+        ))
+    return PeakKinetics(*_rise_relax_numpy(time, force, peaks, baseline))
 
 
-def calculate_metrics(time, force, peaks, properties, baseline):
+def calculate_rise_relax_metrics(time, force, peaks, baseline):
+    """
+    Calculate rise and relaxation kinetics for each contraction.
+
+    Rise time: 10% to 90% of peak amplitude (ascending phase)
+    Relax time: 90% to 10% of peak amplitude (descending phase)
+    Rates: 0.8 * amplitude / time (represents 80% of the excursion)
+
+    Also calculates waveform shape metrics:
+    - Time to Peak: from 10% onset to peak maximum
+    - Time from Peak: from peak maximum to 10% return
+    - Rise/Fall Ratio: Time_to_Peak / Time_from_Peak
+      (1.0 = symmetric, <1.0 = faster rise than fall)
+
+    Parameters
+    ----------
+    time : ndarray
+        Time values
+    force : ndarray
+        Force values
+    peaks : ndarray
+        Peak indices (must be valid indices into time and force arrays)
+    baseline : float
+        Baseline force level
+
+    Returns
+    -------
+    dict with keys:
+        rise_times, relax_times, rise_rates, relax_rates,
+        times_to_peak, times_from_peak, rise_fall_ratios
+    """
+    kinetics = per_peak_kinetics(time, force, peaks, baseline)
+    return {key: values[~np.isnan(values)].tolist()
+            for key, values in zip(_KINETICS_KEYS, kinetics)}
+
+
+def integral_areas(time, force, baseline):
+    """
+    Trapezoid area of the above-baseline force between each pair of samples.
+
+    Entry i covers [time[i], time[i + 1]]; summing any run of entries is
+    exactly np.trapz of the clipped force over those samples, so the file
+    and every bin integrate from this one array.
+    """
+    if HAS_NUMBA:
+        return _integral_areas_kernel(np.ascontiguousarray(time, dtype=np.float64),
+                                      np.ascontiguousarray(force, dtype=np.float64),
+                                      float(baseline))
+    # Same arithmetic in place: one clipped copy plus the output array
+    force_above_baseline = force - baseline
+    np.maximum(force_above_baseline, 0, out=force_above_baseline)
+    areas = force_above_baseline[1:] + force_above_baseline[:-1]
+    areas *= np.diff(time)
+    areas /= 2.0
+    return areas
+
+
+def _integral_areas_kernel(time, force, baseline):
+    """
+    integral_areas in a single pass: subtract, clip and trapezoid per pair
+    of samples, with no full-length temporaries. Compiled with numba when
+    available.
+    """
+    n_areas = max(force.shape[0] - 1, 0)
+    areas = np.empty(n_areas)
+    left = max(force[0] - baseline, 0.0) if n_areas > 0 else 0.0
+    for i in range(n_areas):
+        right = max(force[i + 1] - baseline, 0.0)
+        areas[i] = (time[i + 1] - time[i]) * (right + left) / 2.0
+        left = right
+    return areas
+
+
+if HAS_NUMBA:
+    _integral_areas_kernel = njit(cache=True, nogil=True)(_integral_areas_kernel)
+
+
+def _defined_mean(values):
+    """Mean of the non-NaN entries of a per-peak array (0 if there are none)."""
+    values = values[~np.isnan(values)]
+    return np.mean(values) if len(values) > 0 else 0
+
+
+def calculate_metrics(time, force, peaks, properties, baseline, amplitudes=None,
+                      flag_threshold=FLAG_AMPLITUDE_THRESHOLD, kinetics=None,
+                      boundary_data=None, areas=None, peak_times=None):
     """
     Calculate streamlined 18-metric set (v4.0).
 
@@ -627,6 +1435,11 @@ def calculate_metrics(time, force, peaks, properties, baseline):
      18. Amplitude_Flag                - QC flag
      19. Force_Per_Contraction_mN_sec  - Avg work per contraction
      20. Force_Per_Minute_mN_sec_per_min - Contractile productivity
+
+    ``amplitudes`` (force[peaks] - baseline), ``kinetics`` (per_peak_kinetics),
+    ``boundary_data`` (detect_contraction_boundaries), ``areas``
+    (integral_areas) and ``peak_times`` (time[peaks]) may be passed in when
+    the caller already computed them; they are derived here otherwise.
     """
     metrics = {}
     peaks = np.array(peaks, dtype=int) if len(peaks) > 0 else np.array([], dtype=int)
@@ -660,34 +1473,41 @@ def calculate_metrics(time, force, peaks, properties, baseline):
         return metrics
 
     # Amplitudes
-    amplitudes = force[peaks] - baseline
-    metrics['Mean_Amplitude_mN'] = np.mean(amplitudes)
-    metrics['Amplitude_CV'] = (np.std(amplitudes) / np.mean(amplitudes) * 100) if np.mean(amplitudes) > 0 else 0
+    if amplitudes is None:
+        amplitudes = force[peaks] - baseline
+    mean_amplitude = np.mean(amplitudes)
+    metrics['Mean_Amplitude_mN'] = mean_amplitude
+    metrics['Amplitude_CV'] = (np.std(amplitudes) / mean_amplitude * 100) if mean_amplitude > 0 else 0
 
     # Frequency
     metrics['Frequency_cpm'] = (n_contractions / duration * 60) if duration > 0 else 0
 
     # Period CV (rhythm regularity)
     if n_contractions > 1:
-        periods = np.diff(time[peaks])
+        if peak_times is None:
+            peak_times = time[peaks]
+        periods = np.diff(peak_times)
         metrics['Period_CV'] = (np.std(periods) / np.mean(periods) * 100) if np.mean(periods) > 0 else 0
     else:
         metrics['Period_CV'] = 0
 
     # Force integral
-    force_above_baseline = np.maximum(force - baseline, 0)
-    metrics['Integral_Force_mN_sec'] = np.trapz(force_above_baseline, time)
+    if areas is None:
+        areas = integral_areas(time, force, baseline)
+    metrics['Integral_Force_mN_sec'] = areas.sum()
 
     # Waveform kinetics (Time_to_Peak, Time_from_Peak, Rise_Fall_Ratio)
-    kinetics = calculate_rise_relax_metrics(time, force, peaks, baseline)
-    metrics['Mean_Time_to_Peak_sec'] = np.mean(kinetics['times_to_peak']) if kinetics['times_to_peak'] else 0
-    metrics['Mean_Time_from_Peak_sec'] = np.mean(kinetics['times_from_peak']) if kinetics['times_from_peak'] else 0
-    metrics['Mean_Rise_Fall_Ratio'] = np.mean(kinetics['rise_fall_ratios']) if kinetics['rise_fall_ratios'] else 0
+    if kinetics is None:
+        kinetics = per_peak_kinetics(time, force, peaks, baseline)
+    metrics['Mean_Time_to_Peak_sec'] = _defined_mean(kinetics.times_to_peak)
+    metrics['Mean_Time_from_Peak_sec'] = _defined_mean(kinetics.times_from_peak)
+    metrics['Mean_Rise_Fall_Ratio'] = _defined_mean(kinetics.rise_fall_ratios)
 
     metrics['Baseline_mN'] = baseline
 
     # Boundary-based metrics (duration, duty cycle, tonic, dF/dt)
-    boundary_data = detect_contraction_boundaries(time, force, peaks, baseline)
+    if boundary_data is None:
+        boundary_data = detect_contraction_boundaries(time, force, peaks, baseline)
     metrics['Mean_Contraction_Duration_sec'] = np.mean(boundary_data['contraction_durations']) if len(boundary_data['contraction_durations']) > 0 else 0
     metrics['Duty_Cycle_percent'] = boundary_data['duty_cycle_percent']
     metrics['Percent_Incomplete_Relaxation'] = boundary_data['percent_incomplete_relaxation']
@@ -699,8 +1519,8 @@ def calculate_metrics(time, force, peaks, properties, baseline):
     metrics['Mean_dF_dt_min_mN_per_sec'] = np.mean(boundary_data['dF_dt_min']) if len(boundary_data['dF_dt_min']) > 0 else 0
 
     # Amplitude flag
-    if metrics['Mean_Amplitude_mN'] < FLAG_AMPLITUDE_THRESHOLD and n_contractions > 0:
-        metrics['Amplitude_Flag'] = f'LOW_AMP ({metrics["Mean_Amplitude_mN"]:.4f} mN < {FLAG_AMPLITUDE_THRESHOLD} mN)'
+    if metrics['Mean_Amplitude_mN'] < flag_threshold and n_contractions > 0:
+        metrics['Amplitude_Flag'] = f'LOW_AMP ({metrics["Mean_Amplitude_mN"]:.4f} mN < {flag_threshold} mN)'
     else:
         metrics['Amplitude_Flag'] = ''
 
@@ -712,12 +1532,16 @@ def calculate_metrics(time, force, peaks, properties, baseline):
     return metrics
 
 
-def calculate_binned_metrics(time, force, peaks, properties, baseline, bin_duration, time_window):
+def calculate_binned_metrics(time, force, peaks, properties, baseline, bin_duration, time_window,
+                             amplitudes=None, kinetics=None, boundary_data=None, areas=None,
+                             peak_times=None):
     """
     Calculate metrics in time bins for temporal analysis.
 
-    IMPORTANT: Peak indices are correctly remapped to bin-local coordinates
-    for kinetics and boundary calculations.
+    Kinetics and contraction boundaries are per-peak quantities measured on
+    the full arrays, so they are computed once for all peaks and each bin
+    averages the entries of its own peaks. Duty cycle and incomplete
+    relaxation are recomputed from the boundaries of the bin's peaks.
 
     Parameters
     ----------
@@ -728,16 +1552,54 @@ def calculate_binned_metrics(time, force, peaks, properties, baseline, bin_durat
     baseline : float
     bin_duration : float
     time_window : float
+    amplitudes : ndarray, optional
+        Precomputed force[peaks] - baseline
+    kinetics : PeakKinetics, optional
+        Precomputed per_peak_kinetics for all peaks
+    boundary_data : dict, optional
+        Precomputed detect_contraction_boundaries for all peaks
+    areas : ndarray, optional
+        Precomputed integral_areas of the trace
+    peak_times : ndarray, optional
+        Precomputed time[peaks]
 
     Returns
     -------
-    list of dict
+    ndarray of _BIN_DTYPE
+        One record per bin that contains data (fields as BIN_COLUMNS,
+        without Filename)
     """
-    bins_data = []
     n_bins = int(time_window // bin_duration)
     actual_duration = time[-1] - time[0] if len(time) > 0 else 0
 
     peaks = np.array(peaks, dtype=int) if len(peaks) > 0 else np.array([], dtype=int)
+    if amplitudes is None:
+        amplitudes = force[peaks] - baseline
+    if kinetics is None:
+        kinetics = per_peak_kinetics(time, force, peaks, baseline)
+    if boundary_data is None:
+        boundary_data = detect_contraction_boundaries(time, force, peaks, baseline)
+    if areas is None:
+        areas = integral_areas(time, force, baseline)
+    if peak_times is None:
+        peak_times = time[peaks]
+
+    # Per-bin contraction counts and amplitude sums in one pass.
+    # Floor division maps a peak at time t to bin [k*bin_duration, (k+1)*bin_duration).
+    peak_bin = (peak_times // bin_duration).astype(np.int64)
+    in_window = (peak_bin >= 0) & (peak_bin < n_bins)
+    peak_counts = np.bincount(peak_bin[in_window], minlength=n_bins)
+    amplitude_sums = np.bincount(peak_bin[in_window],
+                                 weights=amplitudes[in_window],
+                                 minlength=n_bins)
+
+    # Sample range [lo, hi) of every bin from one sorted search (time is
+    # increasing), instead of a full-length boolean mask per bin
+    edge_idx = np.searchsorted(time, np.arange(n_bins + 1) * bin_duration)
+
+    # One row per bin, written in place; bins without peaks keep their zeros
+    bins_data = np.zeros(n_bins, dtype=_BIN_DTYPE)
+    filled = np.zeros(n_bins, dtype=bool)
 
     for bin_idx in range(n_bins):
         bin_start = bin_idx * bin_duration
@@ -747,80 +1609,98 @@ def calculate_binned_metrics(time, force, peaks, properties, baseline, bin_durat
             continue
 
         # Get bin data
-        bin_mask = (time >= bin_start) & (time < bin_end)
-        bin_time = time[bin_mask]
-        bin_force = force[bin_mask]
-
-        if len(bin_time) == 0:
+        lo, hi = edge_idx[bin_idx], edge_idx[bin_idx + 1]
+        if hi == lo:
             continue
 
         # Find which peaks fall in this bin
-        peak_mask = (time[peaks] >= bin_start) & (time[peaks] < bin_end)
-        peaks_in_bin = peaks[peak_mask]  # These are indices into FULL arrays
-        n_peaks = len(peaks_in_bin)
-
-        bin_metrics = {
-            'Bin': bin_idx + 1,
-            'Time_Start_sec': bin_start,
-            'Time_End_sec': bin_end,
-            'Contractions': n_peaks,
-            'Frequency_cpm': n_peaks / bin_duration * 60,
-        }
+        in_bin = in_window & (peak_bin == bin_idx)
+        n_peaks = int(peak_counts[bin_idx])
+
+        filled[bin_idx] = True
+        bin_metrics = bins_data[bin_idx]  # Structured scalar: a view of the row
+        bin_metrics['Bin'] = bin_idx + 1
+        bin_metrics['Time_Start_sec'] = bin_start
+        bin_metrics['Time_End_sec'] = bin_end
+        bin_metrics['Contractions'] = n_peaks
+        bin_metrics['Frequency_cpm'] = n_peaks / bin_duration * 60
 
         if n_peaks > 0:
-            amplitudes = force[peaks_in_bin] - baseline
-            bin_metrics['Mean_Amplitude_mN'] = np.mean(amplitudes)
+            bin_metrics['Mean_Amplitude_mN'] = amplitude_sums[bin_idx] / n_peaks
 
             # Period CV
             if n_peaks > 1:
-                periods_bin = np.diff(time[peaks_in_bin])
+                periods_bin = np.diff(peak_times[in_bin])
                 bin_metrics['Period_CV'] = (np.std(periods_bin) / np.mean(periods_bin) * 100) if np.mean(periods_bin) > 0 else 0
             else:
                 bin_metrics['Period_CV'] = 0
 
             # Waveform shape (Time_to_Peak, Time_from_Peak, Rise_Fall_Ratio)
-            kinetics = calculate_rise_relax_metrics(
-                time, force, peaks_in_bin, baseline
-            )
-            bin_metrics['Mean_Time_to_Peak_sec'] = np.mean(kinetics['times_to_peak']) if kinetics['times_to_peak'] else 0
-            bin_metrics['Mean_Time_from_Peak_sec'] = np.mean(kinetics['times_from_peak']) if kinetics['times_from_peak'] else 0
-            bin_metrics['Mean_Rise_Fall_Ratio'] = np.mean(kinetics['rise_fall_ratios']) if kinetics['rise_fall_ratios'] else 0
-
-            # Boundary/duty cycle/dF_dt for this bin (uses full arrays)
-            boundary_data = detect_contraction_boundaries(time, force, peaks_in_bin, baseline)
-            bin_metrics['Mean_Contraction_Duration_sec'] = np.mean(boundary_data['contraction_durations']) if len(boundary_data['contraction_durations']) > 0 else 0
-            bin_metrics['Duty_Cycle_percent'] = boundary_data['duty_cycle_percent']
-            bin_metrics['Percent_Incomplete_Relaxation'] = boundary_data['percent_incomplete_relaxation']
-            bin_metrics['Mean_dF_dt_max_mN_per_sec'] = np.mean(boundary_data['dF_dt_max']) if len(boundary_data['dF_dt_max']) > 0 else 0
-            bin_metrics['Mean_dF_dt_min_mN_per_sec'] = np.mean(boundary_data['dF_dt_min']) if len(boundary_data['dF_dt_min']) > 0 else 0
+            bin_metrics['Mean_Time_to_Peak_sec'] = _defined_mean(kinetics.times_to_peak[in_bin])
+            bin_metrics['Mean_Time_from_Peak_sec'] = _defined_mean(kinetics.times_from_peak[in_bin])
+            bin_metrics['Mean_Rise_Fall_Ratio'] = _defined_mean(kinetics.rise_fall_ratios[in_bin])
 
-        else:
-            bin_metrics.update({
-                'Mean_Amplitude_mN': 0,
-                'Period_CV': 0,
-                'Mean_Time_to_Peak_sec': 0,
-                'Mean_Time_from_Peak_sec': 0,
-                'Mean_Rise_Fall_Ratio': 0,
-                'Mean_Contraction_Duration_sec': 0,
-                'Duty_Cycle_percent': 0,
-                'Percent_Incomplete_Relaxation': 0,
-                'Mean_dF_dt_max_mN_per_sec': 0,
-                'Mean_dF_dt_min_mN_per_sec': 0,
-            })
-
-        # Integral force for this bin
-        if len(bin_force) > 0:
-            force_above = np.maximum(bin_force - baseline, 0)
-            bin_metrics['Integral_Force_mN_s'] = np.trapz(force_above, bin_time)
-        else:
-            bin_metrics['Integral_Force_mN_s'] = 0
+            # Boundary/duty cycle/dF_dt for this bin's peaks (full-array boundaries)
+            starts_bin = boundary_data['contraction_starts'][in_bin]
+            ends_bin = boundary_data['contraction_ends'][in_bin]
+            _, incomplete_bin = _intercontraction_intervals(time, starts_bin, ends_bin)
+            bin_metrics['Mean_Contraction_Duration_sec'] = np.mean(boundary_data['contraction_durations'][in_bin])
+            bin_metrics['Duty_Cycle_percent'] = _duty_cycle(time, starts_bin, ends_bin)[1]
+            bin_metrics['Percent_Incomplete_Relaxation'] = (int(np.sum(incomplete_bin)) / len(incomplete_bin) * 100) if len(incomplete_bin) > 0 else 0
+            bin_metrics['Mean_dF_dt_max_mN_per_sec'] = np.mean(boundary_data['dF_dt_max'][in_bin])
+            bin_metrics['Mean_dF_dt_min_mN_per_sec'] = np.mean(boundary_data['dF_dt_min'][in_bin])
+
+        # Integral force for this bin: the areas between its own samples
+        bin_metrics['Integral_Force_mN_s'] = areas[lo:hi - 1].sum()
 
-        bins_data.append(bin_metrics)
+    return bins_data[filled]
 
-    return bins_data
 
+# The full-trace panel is drawn from a min/max envelope with one block
+# (2 points) per horizontal pixel of the figure; peak markers and the zoomed
+# panel use every sample.
+_PLOT_DPI = 100
 
-def create_validation_plot(time, force, peaks, baseline, filename, output_dir, metrics=None):
+# One figure per process, cleared and redrawn for every file
+_plot_figure = None
+
+
+def _minmax_decimate(x, y, n_out):
+    """
+    Oscilloscope-style decimation of a trace for plotting.
+
+    Splits ``y`` into about ``n_out`` equal blocks and keeps the minimum and
+    maximum sample of each (in time order), plus any leftover tail samples.
+    Unlike striding, every peak and trough is kept, so the envelope looks
+    the same as the full trace at screen resolution.
+    """
+    block = len(y) // n_out
+    if block < 2:
+        return x, y
+    n_full = len(y) // block * block
+    blocks = y[:n_full].reshape(-1, block)
+    i_min = blocks.argmin(axis=1)
+    i_max = blocks.argmax(axis=1)
+    offsets = np.arange(len(blocks)) * block
+    idx = np.column_stack([offsets + np.minimum(i_min, i_max),
+                           offsets + np.maximum(i_min, i_max)]).ravel()
+    idx = np.concatenate([idx, np.arange(n_full, len(y))])
+    return x[idx], y[idx]
+
+
+def _validation_figure():
+    """Return the process's reusable (fig, axes) pair with both panels cleared."""
+    global _plot_figure
+    if _plot_figure is None:
+        _plot_figure = plt.subplots(2, 1, figsize=(14, 8))
+    else:
+        for ax in _plot_figure[1]:
+            ax.clear()
+    return _plot_figure
+
+
+def create_validation_plot(time, force, peaks, baseline, filename, output_dir, metrics=None,
+                           config=None):
     """
     Create validation plot showing detected contractions with actual thresholds.
 
@@ -834,15 +1714,20 @@ def create_validation_plot(time, force, peaks, baseline, filename, output_dir, m
     output_dir : Path
     metrics : dict, optional
         If provided, key metrics are annotated on the plot
+    config : Config, optional
+        Parameters shown on the plot (defaults to the module settings)
     """
-    fig, axes = plt.subplots(2, 1, figsize=(14, 8))
+    config = config or Config()
+    fig, axes = _validation_figure()
 
     # Threshold line (actual threshold used)
-    threshold_line = baseline + PEAK_HEIGHT
+    threshold_line = baseline + config.peak_height
 
     # --- Full trace ---
     ax1 = axes[0]
-    ax1.plot(time, force, 'b-', linewidth=0.5, label='Force')
+    width_px = int(fig.get_figwidth() * _PLOT_DPI)
+    ax1.plot(*_minmax_decimate(time, force, width_px), 'b-', linewidth=0.5,
+             label='Force', rasterized=True)
     if len(peaks) > 0:
         ax1.plot(time[peaks], force[peaks], 'ro', markersize=4, label=f'Peaks (n={len(peaks)})')
     ax1.axhline(y=baseline, color='g', linestyle='--', alpha=0.5,
@@ -851,7 +1736,7 @@ def create_validation_plot(time, force, peaks, baseline, filename, output_dir, m
                 label=f'Height Threshold ({threshold_line:.3f} mN)')
     ax1.set_xlabel('Time (sec)')
     ax1.set_ylabel('Force (mN)')
-    ax1.set_title(f'{filename} - Full Trace ({TIME_WINDOW}s)')
+    ax1.set_title(f'{filename} - Full Trace ({config.time_window}s)')
     ax1.legend(loc='upper right', fontsize=8)
     ax1.grid(True, alpha=0.3)
 
@@ -868,10 +1753,12 @@ def create_validation_plot(time, force, peaks, baseline, filename, output_dir, m
 
     # --- Zoomed view (first 60 sec) ---
     ax2 = axes[1]
-    zoom_mask = time <= 60
-    ax2.plot(time[zoom_mask], force[zoom_mask], 'b-', linewidth=0.5)
+    # Time is strictly increasing, so the zoom window is a prefix: plot
+    # views of it rather than masked copies of the whole trace
+    zoom_end = np.searchsorted(time, 60, side='right')
+    ax2.plot(time[:zoom_end], force[:zoom_end], 'b-', linewidth=0.5, rasterized=True)
     if len(peaks) > 0:
-        peaks_in_zoom = peaks[time[peaks] <= 60]
+        peaks_in_zoom = peaks[:np.searchsorted(peaks, zoom_end)]
         ax2.plot(time[peaks_in_zoom], force[peaks_in_zoom], 'ro', markersize=5)
     ax2.axhline(y=baseline, color='g', linestyle='--', alpha=0.5)
     ax2.axhline(y=threshold_line, color='r', linestyle=':', alpha=0.5)
@@ -882,22 +1769,239 @@ def create_validation_plot(time, force, peaks, baseline, filename, output_dir, m
 
     # Parameters annotation on zoomed panel
     param_text = (
-        f"Parameters: height={PEAK_HEIGHT} mN, prominence={PEAK_PROMINENCE} mN, "
-        f"distance={PEAK_DISTANCE/SAMPLING_RATE:.1f}s, width={PEAK_WIDTH/SAMPLING_RATE:.2f}s"
+        f"Parameters: height={config.peak_height} mN, prominence={config.peak_prominence} mN, "
+        f"distance={config.peak_distance/SAMPLING_RATE:.1f}s, width={config.peak_width/SAMPLING_RATE:.2f}s"
     )
     ax2.text(0.02, 0.02, param_text, transform=ax2.transAxes, fontsize=7,
              verticalalignment='bottom', color='gray')
 
-    plt.tight_layout()
+    # tight_layout already fits the panels to the canvas, so savefig skips
+    # the extra bbox_inches='tight' render pass
+    fig.tight_layout()
 
     plot_path = output_dir / f"{filename}_validation.png"
-    plt.savefig(plot_path, dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(plot_path, dpi=_PLOT_DPI)
 
     return plot_path
 
 
-def analyze_folder(input_folder, output_folder):
+def _available_cpus():
+    """
+    Number of CPUs this process may run on.
+
+    Respects the affinity mask (taskset, cluster job slots), which
+    os.cpu_count() ignores; falls back to it where the mask is unavailable.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        return os.cpu_count() or 1
+
+
+def _init_worker():
+    """
+    Worker-process initializer: preload scipy.signal and warm the JIT
+    kernels before the first file arrives.
+    """
+    import scipy.signal  # noqa: F401 -- imported lazily by detect_contractions
+    _warm_up_kernels()
+
+
+def analyze_file(txt_file, plots_dir, config=None):
+    """
+    Run the single-file pipeline: load, trim, detect, metrics, bins, plot.
+
+    Kept at module level so analyze_folder can dispatch it to worker
+    processes. Progress messages are collected rather than printed so the
+    parent can report files in order.
+
+    Parameters
+    ----------
+    txt_file : Path
+        LabChart .txt export
+    plots_dir : Path
+        Folder for the validation plot
+    config : Config, optional
+        Analysis parameters (defaults to the module settings)
+
+    Returns
+    -------
+    dict with keys: name, filename, metrics, bins, log, error
+        ``error`` is None on success, otherwise the exception message.
+    """
+    config = config or Config()
+    txt_file = Path(txt_file)
+    filename = txt_file.stem.strip()
+    log = []
+    result = {'name': txt_file.name, 'filename': filename, 'metrics': None,
+              'bins': None, 'log': log, 'error': None}
+
+    try:
+        # Known-noisy calls only: numpy on degenerate traces (all-NaN or
+        # constant segments), np.loadtxt probing empty candidate slices, and
+        # tight_layout on crowded axes. Anything else is still reported.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            warnings.simplefilter('ignore', category=UserWarning)
+            warnings.simplefilter('ignore', category=pd.errors.DtypeWarning)
+
+            # Load
+            time_raw, force_raw, recording_duration = load_trace(txt_file, config.time_window)
+            n_samples = _recording_samples(time_raw, recording_duration)
+            log.append(f"  Loaded {n_samples} samples ({n_samples/SAMPLING_RATE:.1f} sec)")
+
+            # Extract first N seconds
+            time, force, total_duration = extract_first_n_seconds(time_raw, force_raw, config.time_window,
+                                                                  recording_duration)
+
+            if total_duration <= config.time_window:
+                log.append(f"  Recording is {total_duration:.1f}s (shorter than {config.time_window}s window)")
+            else:
+                log.append(f"  Using first {config.time_window}s from {total_duration:.1f}s recording")
+
+            # Detect contractions (simple fixed parameters)
+            peaks, properties, baseline = detect_contractions(time, force, config)
+            log.append(f"  Detected {len(peaks)} contractions")
+
+            # Calculate metrics (per-peak times, amplitudes, kinetics,
+            # boundaries and integral areas are computed once and shared
+            # with the binned pass)
+            peak_times = time[peaks]
+            amplitudes = force[peaks] - baseline
+            kinetics = per_peak_kinetics(time, force, peaks, baseline)
+            boundary_data = detect_contraction_boundaries(time, force, peaks, baseline)
+            areas = integral_areas(time, force, baseline)
+            metrics = calculate_metrics(time, force, peaks, properties, baseline, amplitudes,
+                                        config.flag_threshold, kinetics, boundary_data, areas,
+                                        peak_times)
+            metrics['Filename'] = filename
+
+            # Check flag
+            if metrics.get('Amplitude_Flag', ''):
+                log.append(f"  ** FLAGGED: {metrics['Amplitude_Flag']}")
+
+            # Binned metrics
+            bins_10s = calculate_binned_metrics(time, force, peaks, properties, baseline,
+                                                config.bin_duration, config.time_window, amplitudes,
+                                                kinetics, boundary_data, areas, peak_times)
+
+            log.append(f"  Calculated metrics ({len(bins_10s)} bins @ {config.bin_duration}s)")
+
+            # Validation plot (with metrics annotation)
+            create_validation_plot(time, force, peaks, baseline, filename, plots_dir, metrics, config)
+            log.append(f"  Created validation plot")
+
+            result['metrics'] = metrics
+            result['bins'] = bins_10s
+
+    except Exception as e:
+        result['error'] = str(e)
+
+    return result
+
+
+# Sheet column order
+OVERALL_COLUMNS = ['Filename', 'Num_Contractions', 'Mean_Amplitude_mN', 'Amplitude_CV',
+                   'Frequency_cpm', 'Period_CV',
+                   'Integral_Force_mN_sec', 'Force_Per_Contraction_mN_sec',
+                   'Force_Per_Minute_mN_sec_per_min',
+                   'Mean_Contraction_Duration_sec',
+                   'Mean_Time_to_Peak_sec', 'Mean_Time_from_Peak_sec', 'Mean_Rise_Fall_Ratio',
+                   'Mean_dF_dt_max_mN_per_sec', 'Mean_dF_dt_min_mN_per_sec',
+                   'Baseline_mN',
+                   'Duty_Cycle_percent', 'Percent_Incomplete_Relaxation',
+                   'Phasic_Tonic_Ratio', 'Mean_Tonic_Force_mN',
+                   'Amplitude_Flag']
+
+BIN_COLUMNS = ['Filename', 'Bin', 'Time_Start_sec', 'Time_End_sec',
+               'Contractions', 'Frequency_cpm', 'Mean_Amplitude_mN',
+               'Period_CV',
+               'Mean_Time_to_Peak_sec', 'Mean_Time_from_Peak_sec',
+               'Mean_Rise_Fall_Ratio',
+               'Mean_dF_dt_max_mN_per_sec', 'Mean_dF_dt_min_mN_per_sec',
+               'Integral_Force_mN_s',
+               'Mean_Contraction_Duration_sec',
+               'Duty_Cycle_percent', 'Percent_Incomplete_Relaxation']
+
+# Count columns are always whole numbers; everything else stays float64
+_INTEGER_COLUMNS = {'Num_Contractions': 'int64', 'Bin': 'int64', 'Contractions': 'int64'}
+
+# Record layout of calculate_binned_metrics (Filename is added per file)
+_BIN_DTYPE = np.dtype([(c, _INTEGER_COLUMNS.get(c, 'float64'))
+                       for c in BIN_COLUMNS if c != 'Filename'])
+
+
+def _build_sheet(rows, columns):
+    """Build one output sheet from per-file row tuples (in ``columns`` order)."""
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    return df.astype({c: t for c, t in _INTEGER_COLUMNS.items() if c in df.columns})
+
+
+def _build_bin_sheet(file_bins):
+    """
+    Build the 10sec_Bins sheet from (filename, bins) pairs.
+
+    The per-file record arrays are concatenated and converted column-wise
+    in one step; the filename is repeated once per bin.
+    """
+    bins = (np.concatenate([b for _, b in file_bins]) if file_bins
+            else np.zeros(0, dtype=_BIN_DTYPE))
+    df = pd.DataFrame(bins)
+    filenames = np.array([f for f, _ in file_bins], dtype=object)
+    df.insert(0, 'Filename', np.repeat(filenames, [len(b) for _, b in file_bins]))
+    return df
+
+
+# Header cell style of DataFrame.to_excel, registered once per workbook
+_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+
+def _excel_value(value):
+    """Map a DataFrame cell to an xlsxwriter value using pandas' conventions."""
+    if isinstance(value, float):
+        if np.isnan(value):
+            return None  # Blank cell, as DataFrame.to_excel writes NaN
+        if np.isinf(value):
+            return 'inf' if value > 0 else '-inf'
+    return value
+
+
+def write_excel_sheets(excel_path, sheets):
+    """
+    Write DataFrames to an Excel workbook, one sheet per DataFrame.
+
+    With xlsxwriter installed the workbook is streamed in constant_memory
+    mode: rows are written strictly in order and flushed to disk instead of
+    being held as cell objects. DataFrame.to_excel writes column by column,
+    which constant_memory cannot handle, so rows are written here directly.
+    Without xlsxwriter, pandas' openpyxl writer is used.
+
+    Parameters
+    ----------
+    excel_path : Path
+        Output .xlsx path
+    sheets : list of (str, DataFrame)
+        Sheet names and contents, in workbook order
+    """
+    if not HAS_XLSXWRITER:
+        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+            for sheet_name, df in sheets:
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+        return
+
+    workbook = xlsxwriter.Workbook(str(excel_path), {'constant_memory': True})
+    try:
+        header_format = workbook.add_format(_HEADER_FORMAT)
+        for sheet_name, df in sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+            for row_idx, row in enumerate(df.itertuples(index=False, name=None), 1):
+                worksheet.write_row(row_idx, 0, [_excel_value(v) for v in row])
+    finally:
+        workbook.close()
+
+
+def analyze_folder(input_folder, output_folder, config=None):
     """
     Analyze all .txt files in a folder.
 
@@ -905,7 +2009,16 @@ def analyze_folder(input_folder, output_folder):
     ----------
     input_folder : str or Path
     output_folder : str or Path
+    config : Config, optional
+        Analysis parameters (defaults to the module settings)
+
+    Returns
+    -------
+    tuple of (DataFrame, DataFrame, Path) or None
+        The Overall_Metrics and 10sec_Bins sheets and the Excel path they
+        were written to; None when the folder has no .txt files.
     """
+    config = config or Config()
     input_folder = Path(input_folder)
     output_folder = Path(output_folder)
 
@@ -917,7 +2030,7 @@ def analyze_folder(input_folder, output_folder):
 
     if len(txt_files) == 0:
         print(f"No .txt files found in: {input_folder}")
-        return
+        return None
 
     print(f"Input: {input_folder}")
     print(f"Found {len(txt_files)} files to analyze")
@@ -928,85 +2041,45 @@ def analyze_folder(input_folder, output_folder):
     failed_files = []
     flagged_files = []
 
-    for i, txt_file in enumerate(txt_files, 1):
-        filename = txt_file.stem.strip()
-        print(f"[{i}/{len(txt_files)}] Processing: {txt_file.name}")
-
-        try:
-            # Load
-            time_raw, force_raw = load_labchart_file(txt_file)
-            print(f"  Loaded {len(time_raw)} samples ({len(time_raw)/SAMPLING_RATE:.1f} sec)")
+    # Files are independent: analyze them in parallel, report in file order
+    n_workers = min(len(txt_files), _available_cpus())
+    worker = partial(analyze_file, plots_dir=plots_dir, config=config)
+    if n_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker)
+        # Largest recordings are submitted first so a long file doesn't start
+        # last and leave the other workers idle; results are still read back
+        # in file order
+        by_size = sorted(txt_files, key=lambda f: f.stat().st_size, reverse=True)
+        futures = {f: executor.submit(worker, f) for f in by_size}
+        results = (futures[f].result() for f in txt_files)
+    else:
+        executor = None
+        results = map(worker, txt_files)
 
-            # Extract first N seconds
-            time, force, total_duration = extract_first_n_seconds(time_raw, force_raw, TIME_WINDOW)
+    try:
+        for i, result in enumerate(results, 1):
+            # Each file's report goes out in a single write
+            lines = [f"[{i}/{len(txt_files)}] Processing: {result['name']}", *result['log']]
 
-            if total_duration <= TIME_WINDOW:
-                print(f"  Recording is {total_duration:.1f}s (shorter than {TIME_WINDOW}s window)")
+            if result['error'] is not None:
+                lines.append(f"  ERROR: {result['error']}")
+                failed_files.append(result['name'])
             else:
-                print(f"  Using first {TIME_WINDOW}s from {total_duration:.1f}s recording")
-
-            # Detect contractions (simple fixed parameters)
-            peaks, properties, baseline = detect_contractions(time, force)
-            print(f"  Detected {len(peaks)} contractions")
-
-            # Calculate metrics
-            metrics = calculate_metrics(time, force, peaks, properties, baseline)
-            metrics['Filename'] = filename
-
-            # Check flag
-            if metrics.get('Amplitude_Flag', ''):
-                flagged_files.append(filename)
-                print(f"  ** FLAGGED: {metrics['Amplitude_Flag']}")
-
-            # Binned metrics
-            bins_10s = calculate_binned_metrics(time, force, peaks, properties, baseline, BIN_DURATION, TIME_WINDOW)
-            for b in bins_10s:
-                b['Filename'] = filename
-
-            print(f"  Calculated metrics ({len(bins_10s)} bins @ {BIN_DURATION}s)")
+                metrics = result['metrics']
+                if metrics.get('Amplitude_Flag', ''):
+                    flagged_files.append(result['filename'])
 
-            # Validation plot (with metrics annotation)
-            create_validation_plot(time, force, peaks, baseline, filename, plots_dir, metrics)
-            print(f"  Created validation plot")
+                all_overall.append(tuple(metrics[c] for c in OVERALL_COLUMNS))
+                all_10s_bins.append((result['filename'], result['bins']))
 
-            all_overall.append(metrics)
-            all_10s_bins.extend(bins_10s)
-            print()
+            print("\n".join(lines) + "\n")
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-        except Exception as e:
-            print(f"  ERROR: {e}")
-            failed_files.append(txt_file.name)
-            print()
-            continue
-
-    # Build DataFrames
-    df_overall = pd.DataFrame(all_overall)
-    df_10s = pd.DataFrame(all_10s_bins)
-
-    # Column ordering
-    overall_cols = ['Filename', 'Num_Contractions', 'Mean_Amplitude_mN', 'Amplitude_CV',
-                    'Frequency_cpm', 'Period_CV',
-                    'Integral_Force_mN_sec', 'Force_Per_Contraction_mN_sec',
-                    'Force_Per_Minute_mN_sec_per_min',
-                    'Mean_Contraction_Duration_sec',
-                    'Mean_Time_to_Peak_sec', 'Mean_Time_from_Peak_sec', 'Mean_Rise_Fall_Ratio',
-                    'Mean_dF_dt_max_mN_per_sec', 'Mean_dF_dt_min_mN_per_sec',
-                    'Baseline_mN',
-                    'Duty_Cycle_percent', 'Percent_Incomplete_Relaxation',
-                    'Phasic_Tonic_Ratio', 'Mean_Tonic_Force_mN',
-                    'Amplitude_Flag']
-    df_overall = df_overall[[c for c in overall_cols if c in df_overall.columns]]
-
-    bin_cols = ['Filename', 'Bin', 'Time_Start_sec', 'Time_End_sec',
-                'Contractions', 'Frequency_cpm', 'Mean_Amplitude_mN',
-                'Period_CV',
-                'Mean_Time_to_Peak_sec', 'Mean_Time_from_Peak_sec',
-                'Mean_Rise_Fall_Ratio',
-                'Mean_dF_dt_max_mN_per_sec', 'Mean_dF_dt_min_mN_per_sec',
-                'Integral_Force_mN_s',
-                'Mean_Contraction_Duration_sec',
-                'Duty_Cycle_percent', 'Percent_Incomplete_Relaxation']
-    df_10s = df_10s[[c for c in bin_cols if c in df_10s.columns]]
+    # Build DataFrames (one construction per sheet from the collected rows)
+    df_overall = _build_sheet(all_overall, OVERALL_COLUMNS)
+    df_10s = _build_bin_sheet(all_10s_bins)
 
     # Save to Excel
     print("=" * 80)
@@ -1016,13 +2089,12 @@ def analyze_folder(input_folder, output_folder):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     excel_path = output_folder / f"Myography_Analysis_{timestamp}.xlsx"
 
-    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-        df_overall.to_excel(writer, sheet_name='Overall_Metrics', index=False)
-        df_10s.to_excel(writer, sheet_name='10sec_Bins', index=False)
+    write_excel_sheets(excel_path, [('Overall_Metrics', df_overall),
+                                    ('10sec_Bins', df_10s)])
 
     print(f"Created: {excel_path}")
-    print(f"  Sheet 1: Overall_Metrics ({len(df_overall)} files, first {TIME_WINDOW}s)")
-    print(f"  Sheet 2: 10sec_Bins (~{len(df_10s)} rows, first {TIME_WINDOW}s)")
+    print(f"  Sheet 1: Overall_Metrics ({len(df_overall)} files, first {config.time_window}s)")
+    print(f"  Sheet 2: 10sec_Bins (~{len(df_10s)} rows, first {config.time_window}s)")
 
     # Move processed files
     print("\n" + "=" * 80)
@@ -1034,13 +2106,25 @@ def analyze_folder(input_folder, output_folder):
         # Create a batch subfolder with matching timestamp
         batch_folder = processed_folder / f"Batch_{timestamp}"
         batch_folder.mkdir(exist_ok=True)
+        # Same filesystem (the usual project layout): a plain rename per file
+        same_fs = input_folder.stat().st_dev == batch_folder.stat().st_dev
+        move = os.replace if same_fs else shutil.move
+        # Single-process runs still hold the sidecars memory-mapped in the
+        # trace memo; Windows refuses to move a mapped file
+        result = None
+        _load_trace_memo.cache_clear()
+        failed = set(failed_files)
         moved_count = 0
         for txt_file in txt_files:
-            if txt_file.name not in failed_files:
+            if txt_file.name not in failed:
                 try:
                     dest = batch_folder / txt_file.name
-                    shutil.move(str(txt_file), str(dest))
+                    move(txt_file, dest)
                     moved_count += 1
+                    # Keep the parsed-trace cache with its source file
+                    for cache_path in (trace_cache_path, trace_stamp_path):
+                        if cache_path(txt_file).exists():
+                            move(cache_path(txt_file), cache_path(dest))
                 except Exception as e:
                     print(f"  Could not move {txt_file.name}: {e}")
         print(f"\nMoved {moved_count} files to: {batch_folder}/")
@@ -1057,11 +2141,11 @@ def analyze_folder(input_folder, output_folder):
     if len(df_overall) > 0:
         print(f"Total peaks detected: {int(df_overall['Num_Contractions'].sum())}")
     print(f"\nParameters used:")
-    print(f"  PEAK_HEIGHT:     {PEAK_HEIGHT} mN")
-    print(f"  PEAK_PROMINENCE: {PEAK_PROMINENCE} mN")
-    print(f"  PEAK_DISTANCE:   {PEAK_DISTANCE} samples ({PEAK_DISTANCE/SAMPLING_RATE:.1f} sec)")
-    print(f"  PEAK_WIDTH:      {PEAK_WIDTH} samples ({PEAK_WIDTH/SAMPLING_RATE:.2f} sec)")
-    print(f"  TIME_WINDOW:     {TIME_WINDOW} sec")
+    print(f"  PEAK_HEIGHT:     {config.peak_height} mN")
+    print(f"  PEAK_PROMINENCE: {config.peak_prominence} mN")
+    print(f"  PEAK_DISTANCE:   {config.peak_distance} samples ({config.peak_distance/SAMPLING_RATE:.1f} sec)")
+    print(f"  PEAK_WIDTH:      {config.peak_width} samples ({config.peak_width/SAMPLING_RATE:.2f} sec)")
+    print(f"  TIME_WINDOW:     {config.time_window} sec")
     print(f"\nOutput: {excel_path}")
     print(f"Plots:  {plots_dir}/")
 
@@ -1077,6 +2161,36 @@ def analyze_folder(input_folder, output_folder):
 
     print("\n" + "=" * 80 + "\n")
 
+    return df_overall, df_10s, excel_path
+
+
+def analyze_and_organize(input_folder, output_folder, config=None):
+    """
+    Analyze a folder, then split the results by experiment in the same process.
+
+    The organizer is handed the sheets analyze_folder just built, so the
+    master Excel is not read back from disk.
+
+    Parameters
+    ----------
+    input_folder : str or Path
+    output_folder : str or Path
+    config : Config, optional
+        Analysis parameters (defaults to the module settings)
+
+    Returns
+    -------
+    bool
+        False if there was nothing to analyze or organizing failed.
+    """
+    from myography_organizer_v2_2 import organize_results_from_frames
+
+    result = analyze_folder(input_folder, output_folder, config)
+    if result is None:
+        return False
+    df_overall, df_10s, _ = result
+    return organize_results_from_frames(df_overall, df_10s, output_folder)
+
 
 def main():
     """Main entry point.
@@ -1091,7 +2205,7 @@ def main():
         python3 myography_analyzer.py INPUT_FOLDER OUTPUT_FOLDER [PEAK_HEIGHT]
         Uses the two folders directly.
     """
-    global PEAK_HEIGHT
+    peak_height = PEAK_HEIGHT
 
     if len(sys.argv) < 2:
         print("\nUsage:")
@@ -1131,12 +2245,12 @@ def main():
         # PEAK_HEIGHT is the second argument in project mode
         if len(sys.argv) >= 3:
             try:
-                PEAK_HEIGHT = float(sys.argv[2])
-                if PEAK_HEIGHT < 0.01 or PEAK_HEIGHT > 0.50:
-                    print(f"Warning: PEAK_HEIGHT {PEAK_HEIGHT} is outside typical range (0.01-0.50)")
+                peak_height = float(sys.argv[2])
+                if peak_height < 0.01 or peak_height > 0.50:
+                    print(f"Warning: PEAK_HEIGHT {peak_height} is outside typical range (0.01-0.50)")
                     print("Proceeding anyway...")
             except ValueError:
-                print(f"Warning: Could not parse PEAK_HEIGHT '{sys.argv[2]}', using default {PEAK_HEIGHT}")
+                print(f"Warning: Could not parse PEAK_HEIGHT '{sys.argv[2]}', using default {peak_height}")
         custom_height = len(sys.argv) >= 3
     elif len(sys.argv) >= 3:
         # Explicit mode (two separate paths)
@@ -1145,12 +2259,12 @@ def main():
         # PEAK_HEIGHT is the third argument in explicit mode
         if len(sys.argv) >= 4:
             try:
-                PEAK_HEIGHT = float(sys.argv[3])
-                if PEAK_HEIGHT < 0.01 or PEAK_HEIGHT > 0.50:
-                    print(f"Warning: PEAK_HEIGHT {PEAK_HEIGHT} is outside typical range (0.01-0.50)")
+                peak_height = float(sys.argv[3])
+                if peak_height < 0.01 or peak_height > 0.50:
+                    print(f"Warning: PEAK_HEIGHT {peak_height} is outside typical range (0.01-0.50)")
                     print("Proceeding anyway...")
             except ValueError:
-                print(f"Warning: Could not parse PEAK_HEIGHT '{sys.argv[3]}', using default {PEAK_HEIGHT}")
+                print(f"Warning: Could not parse PEAK_HEIGHT '{sys.argv[3]}', using default {peak_height}")
         custom_height = len(sys.argv) >= 4
     else:
         # Single argument but no 1_RawData found
@@ -1162,23 +2276,25 @@ def main():
         print()
         sys.exit(1)
 
+    config = Config(peak_height=peak_height)
+
     # Print header
     print("=" * 80)
     print("WIRE MYOGRAPHY ANALYZER v4.0")
     print("=" * 80)
     print("\nFixed-parameter detection for reproducible cross-condition analysis.")
     print("\nParameters:")
-    print(f"  Peak Height:     {PEAK_HEIGHT} mN" + (" [CUSTOM]" if custom_height else " [DEFAULT]"))
-    print(f"  Peak Prominence: {PEAK_PROMINENCE} mN")
-    print(f"  Peak Distance:   {PEAK_DISTANCE} samples ({PEAK_DISTANCE/SAMPLING_RATE:.1f} sec)")
-    print(f"  Peak Width:      {PEAK_WIDTH} samples ({PEAK_WIDTH/SAMPLING_RATE:.2f} sec)")
-    print(f"  Time Window:     FIRST {TIME_WINDOW} seconds")
-    print(f"  Bin Duration:    {BIN_DURATION} sec")
+    print(f"  Peak Height:     {config.peak_height} mN" + (" [CUSTOM]" if custom_height else " [DEFAULT]"))
+    print(f"  Peak Prominence: {config.peak_prominence} mN")
+    print(f"  Peak Distance:   {config.peak_distance} samples ({config.peak_distance/SAMPLING_RATE:.1f} sec)")
+    print(f"  Peak Width:      {config.peak_width} samples ({config.peak_width/SAMPLING_RATE:.2f} sec)")
+    print(f"  Time Window:     FIRST {config.time_window} seconds")
+    print(f"  Bin Duration:    {config.bin_duration} sec")
     print(f"  Sampling Rate:   {SAMPLING_RATE} Hz")
-    print(f"  Flag Threshold:  {FLAG_AMPLITUDE_THRESHOLD} mN")
+    print(f"  Flag Threshold:  {config.flag_threshold} mN")
     print("=" * 80 + "\n")
 
-    analyze_folder(input_folder, output_folder)
+    analyze_folder(input_folder, output_folder, config)
 
 
 if __name__ == "__main__":
@@ -13,9 +13,26 @@ Date: February 2026
 
 import pandas as pd
 from pathlib import Path
+import os
 import shutil
 import sys
 import re
+import math
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+# Rust-based .xlsx reader, used through pandas' engine='calamine' (pandas >= 2.2)
+try:
+    import python_calamine  # noqa: F401
+    HAS_CALAMINE = tuple(int(v) for v in pd.__version__.split('.')[:2]) >= (2, 2)
+except ImportError:
+    HAS_CALAMINE = False
 
 # Known project codes -> friendly folder names
 # If a code is NOT here, the code itself becomes the folder name
@@ -28,6 +45,22 @@ KNOWN_CODES = {
     'sham': 'WT_vs_KO',
 }
 
+# Threads used to copy validation plots into the experiment folders
+COPY_THREADS = 8
+
+# Case-insensitive view of KNOWN_CODES for classify_file
+_KNOWN_CODES_CI = {code.lower(): folder_name for code, folder_name in KNOWN_CODES.items()}
+
+# DATE_CODE_Sex#: 8-digit date, candidate code (starts with letter), sex indicator
+_PROJECT_CODE_RE = re.compile(
+    r'\d{8}_'                                    # date
+    r'([A-Za-z][A-Za-z0-9]*)_'                   # candidate code (starts with letter)
+    r'(?:Male|Female|M|F)\d',                     # followed by sex indicator
+    re.IGNORECASE
+)
+
+_SEX_WORDS = frozenset(['MALE', 'FEMALE', 'M', 'F'])
+
 def extract_project_code(filename):
     """
     Extract project code from filename.
@@ -41,19 +74,15 @@ def extract_project_code(filename):
     """
     # After the 8-digit date and underscore, look for a code before Sex
     # Code is anything that is NOT a sex indicator (Male/Female/M/F followed by digit)
-    match = re.match(
-        r'\d{8}_'                                    # date
-        r'([A-Za-z][A-Za-z0-9]*)_'                   # candidate code (starts with letter)
-        r'(?:Male|Female|M|F)\d',                     # followed by sex indicator
-        filename, re.IGNORECASE
-    )
+    match = _PROJECT_CODE_RE.match(filename)
     if match:
         code = match.group(1)
         # Make sure it's actually a code, not the sex itself
-        if code.upper() not in ['MALE', 'FEMALE', 'M', 'F']:
+        if code.upper() not in _SEX_WORDS:
             return code
     return None
 
+@lru_cache(maxsize=None)
 def classify_file(filename):
     """
     Classify file by project code extracted from filename.
@@ -61,18 +90,150 @@ def classify_file(filename):
     Known codes -> friendly folder name (e.g., R -> Ryanodine)
     Unknown codes -> code used as folder name (e.g., CPA -> CPA)
     No code -> Yoda_Only
+    
+    Results are cached per filename.
     """
     code = extract_project_code(filename)
     if code is None:
         return 'Yoda_Only'
     
-    # Check known mappings (case-insensitive lookup)
-    for known_code, folder_name in KNOWN_CODES.items():
-        if code.lower() == known_code.lower():
-            return folder_name
+    # Known mappings (case-insensitive); unknown code: use as-is for folder name
+    return _KNOWN_CODES_CI.get(code.lower(), code)
+
+
+def experiment_rows(df, experiment_of):
+    """
+    Find each experiment's rows in a sheet with a single groupby.
+    
+    Only row positions are kept, so the caller can take one experiment's
+    slice at a time instead of holding a copy of every group at once.
+    Positions are in original row order; rows whose Filename is not in
+    ``experiment_of`` belong to no experiment.
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Sheet with a 'Filename' column
+    experiment_of : dict
+        Filename -> experiment folder name
     
-    # Unknown code: use as-is for folder name
-    return code
+    Returns:
+    --------
+    dict of experiment -> array of row positions
+    """
+    experiments = df['Filename'].map(experiment_of)
+    return df.groupby(experiments, sort=False).indices
+
+
+# Header cell style of DataFrame.to_excel, registered once per workbook
+_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+
+def _excel_value(value):
+    """Map a DataFrame cell to an xlsxwriter value using pandas' conventions."""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None  # Blank cell, as DataFrame.to_excel writes NaN
+        if math.isinf(value):
+            return 'inf' if value > 0 else '-inf'
+    return value
+
+
+def write_excel_sheets(excel_path, sheets):
+    """
+    Write DataFrames to an Excel workbook, one sheet per DataFrame.
+    
+    With xlsxwriter installed, rows are streamed in constant_memory mode
+    (same output as the analyzer's master workbook); otherwise pandas'
+    openpyxl writer is used.
+    
+    Parameters:
+    -----------
+    excel_path : Path
+        Output .xlsx path
+    sheets : list of (str, DataFrame)
+        Sheet names and contents, in workbook order
+    """
+    if not HAS_XLSXWRITER:
+        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+            for sheet_name, df in sheets:
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+        return
+    
+    workbook = xlsxwriter.Workbook(str(excel_path), {'constant_memory': True})
+    try:
+        header_format = workbook.add_format(_HEADER_FORMAT)
+        for sheet_name, df in sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, [str(c) for c in df.columns], header_format)
+            for row_idx, row in enumerate(df.itertuples(index=False, name=None), 1):
+                worksheet.write_row(row_idx, 0, [_excel_value(v) for v in row])
+    finally:
+        workbook.close()
+
+
+def write_experiment(experiment, exp_sheets, n_files, output_base, plots_source, plot_files):
+    """
+    Create one experiment folder: its Excel workbook and validation plots.
+    
+    Progress messages are collected rather than printed and are reported
+    by the caller once the experiment is written.
+    
+    Parameters:
+    -----------
+    experiment : str
+        Experiment folder name
+    exp_sheets : list of (str, DataFrame)
+        Sheet names and this experiment's rows, in workbook order
+    n_files : int
+        Number of recordings in the experiment
+    output_base : Path
+        Base folder where the experiment folder is created
+    plots_source : Path
+        Folder holding the analyzer's validation plots
+    plot_files : list of str or None
+        Plots to copy from plots_source (None if there is no such folder)
+    
+    Returns:
+    --------
+    list of str
+        Progress messages
+    """
+    log = [f"Processing {experiment}..."]
+    
+    # Create experiment folder
+    exp_folder = output_base / experiment
+    exp_folder.mkdir(parents=True, exist_ok=True)
+    
+    plots_subfolder = exp_folder / 'validation_plots'
+    plots_subfolder.mkdir(exist_ok=True)
+    
+    # Create experiment-specific Excel
+    write_excel_sheets(exp_folder / f"{experiment}.xlsx", exp_sheets)
+    
+    log.append(f"  âœ“ Created {experiment}.xlsx with {len(exp_sheets)} sheets ({n_files} files)")
+    
+    # Copy validation plots
+    if plot_files is not None:
+        # Copies are I/O-bound: overlap them on a few threads
+        with ThreadPoolExecutor(max_workers=COPY_THREADS) as pool:
+            copies = [pool.submit(shutil.copy2, str(plots_source / plot_file),
+                                  str(plots_subfolder / plot_file))
+                      for plot_file in plot_files]
+        
+        copied_plots = 0
+        for plot_file, copy in zip(plot_files, copies):
+            e = copy.exception()
+            if e is None:
+                copied_plots += 1
+            else:
+                log.append(f"  âš ï¸  Could not copy {plot_file}: {e}")
+        
+        log.append(f"  âœ“ Copied {copied_plots} validation plots\n")
+    else:
+        log.append(f"  âš ï¸  No validation_plots folder found\n")
+    
+    return log
 
 
 def organize_results(master_excel, output_base):
@@ -102,32 +263,57 @@ def organize_results(master_excel, output_base):
     # Read sheets (v4.0 has 2 sheets; older versions had 3)
     print("Reading Excel sheets...")
     try:
-        df_overall = pd.read_excel(master_excel, sheet_name='Overall_Metrics')
-        df_bins_10s = pd.read_excel(master_excel, sheet_name='10sec_Bins')
-        xlsx_sheets = pd.ExcelFile(master_excel).sheet_names
-        if '30sec_Bins' in xlsx_sheets:
-            df_bins_30s = pd.read_excel(master_excel, sheet_name='30sec_Bins')
-            has_30s = True
-        else:
-            df_bins_30s = None
-            has_30s = False
+        # Open the workbook once and parse each sheet from it
+        with pd.ExcelFile(master_excel, engine='calamine' if HAS_CALAMINE else None) as xlsx:
+            df_overall = xlsx.parse('Overall_Metrics')
+            df_bins_10s = xlsx.parse('10sec_Bins')
+            if '30sec_Bins' in xlsx.sheet_names:
+                df_bins_30s = xlsx.parse('30sec_Bins')
+                has_30s = True
+            else:
+                df_bins_30s = None
+                has_30s = False
         n_sheets = 3 if has_30s else 2
         print(f"âœ“ Loaded {n_sheets} sheets successfully\n")
     except Exception as e:
         print(f"âŒ ERROR reading Excel: {e}")
         return False
     
+    return organize_results_from_frames(df_overall, df_bins_10s, output_base, df_bins_30s)
+
+
+def organize_results_from_frames(df_overall, df_bins_10s, output_base, df_bins_30s=None):
+    """
+    Organize already-loaded result sheets and validation plots by experiment type
+    
+    Lets a caller that still holds the analyzer's DataFrames skip reading
+    the master Excel back from disk; organize_results reads the sheets and
+    delegates here.
+    
+    Parameters:
+    -----------
+    df_overall : DataFrame
+        Overall_Metrics sheet
+    df_bins_10s : DataFrame
+        10sec_Bins sheet
+    output_base : str or Path
+        Base folder where experiment folders will be created (holds validation_plots/)
+    df_bins_30s : DataFrame, optional
+        30sec_Bins sheet of older (v3.1) workbooks
+    """
+    output_base = Path(output_base)
+    has_30s = df_bins_30s is not None
+    n_sheets = 3 if has_30s else 2
+    
     # Get unique filenames
     all_filenames = df_overall['Filename'].unique()
     print(f"Total files: {len(all_filenames)}\n")
     
-    # Classify files
+    # Classify files (each unique filename once)
+    experiment_of = {filename: classify_file(filename) for filename in all_filenames}
     file_classification = {}
-    for filename in all_filenames:
-        experiment = classify_file(filename)
-        if experiment not in file_classification:
-            file_classification[experiment] = []
-        file_classification[experiment].append(filename)
+    for filename, experiment in experiment_of.items():
+        file_classification.setdefault(experiment, []).append(filename)
     
     # Print classification summary
     print("Classification Summary:")
@@ -136,52 +322,41 @@ def organize_results(master_excel, output_base):
         print(f"  {experiment}: {len(files)} files")
     print("-" * 80 + "\n")
     
-    # Create organized folders
+    # Locate each experiment's rows in every sheet in one pass
+    overall_rows = experiment_rows(df_overall, experiment_of)
+    bins_10s_rows = experiment_rows(df_bins_10s, experiment_of)
+    bins_30s_rows = experiment_rows(df_bins_30s, experiment_of) if has_30s else None
+    
+    # List the source plots once instead of checking each file separately
+    plots_source = output_base / 'validation_plots'
+    if plots_source.is_dir():
+        with os.scandir(plots_source) as entries:
+            available_plots = {entry.name for entry in entries if entry.is_file()}
+    else:
+        available_plots = None
+    
+    # Written one after another: a whole batch takes a few tens of ms, far
+    # less than starting worker processes (each spawn re-imports this module)
+    logs = []
     for experiment, filenames in file_classification.items():
-        print(f"Processing {experiment}...")
-        
-        # Create experiment folder
-        exp_folder = output_base / experiment
-        exp_folder.mkdir(parents=True, exist_ok=True)
-        
-        plots_subfolder = exp_folder / 'validation_plots'
-        plots_subfolder.mkdir(exist_ok=True)
-        
         # Filter each sheet for this experiment's files
-        exp_overall = df_overall[df_overall['Filename'].isin(filenames)].copy()
-        exp_bins_10s = df_bins_10s[df_bins_10s['Filename'].isin(filenames)].copy()
-        exp_bins_30s = df_bins_30s[df_bins_30s['Filename'].isin(filenames)].copy() if has_30s else None
+        exp_sheets = [('Overall_Metrics', df_overall.take(overall_rows.get(experiment, []))),
+                      ('10sec_Bins', df_bins_10s.take(bins_10s_rows.get(experiment, [])))]
+        if has_30s:
+            exp_sheets.append(('30sec_Bins', df_bins_30s.take(bins_30s_rows.get(experiment, []))))
         
-        # Create experiment-specific Excel with 3 sheets
-        exp_excel_path = exp_folder / f"{experiment}.xlsx"
-        with pd.ExcelWriter(exp_excel_path, engine='openpyxl') as writer:
-            exp_overall.to_excel(writer, sheet_name='Overall_Metrics', index=False)
-            exp_bins_10s.to_excel(writer, sheet_name='10sec_Bins', index=False)
-            if has_30s and exp_bins_30s is not None:
-                exp_bins_30s.to_excel(writer, sheet_name='30sec_Bins', index=False)
-        
-        print(f"  âœ“ Created {experiment}.xlsx with {n_sheets} sheets ({len(filenames)} files)")
-        
-        # Copy validation plots
-        plots_source = output_base / 'validation_plots'
-        if plots_source.exists():
-            copied_plots = 0
-            for filename in filenames:
-                # Plot filename is [filename]_validation.png
-                plot_file = f"{filename}_validation.png"
-                source_plot = plots_source / plot_file
-                
-                if source_plot.exists():
-                    dest_plot = plots_subfolder / plot_file
-                    try:
-                        shutil.copy2(str(source_plot), str(dest_plot))
-                        copied_plots += 1
-                    except Exception as e:
-                        print(f"  âš ï¸  Could not copy {plot_file}: {e}")
-            
-            print(f"  âœ“ Copied {copied_plots} validation plots\n")
+        # Plot filename is [filename]_validation.png
+        if available_plots is not None:
+            plot_files = [f"{filename}_validation.png" for filename in filenames]
+            plot_files = [plot_file for plot_file in plot_files if plot_file in available_plots]
         else:
-            print(f"  âš ï¸  No validation_plots folder found\n")
+            plot_files = None
+        
+        logs.append(write_experiment(experiment, exp_sheets, len(filenames),
+                                     output_base, plots_source, plot_files))
+    
+    for log in logs:
+        print("\n".join(log))
     
     # Summary
     print("="*80)
@@ -16,10 +16,31 @@ v3.1 (Feb 2026) - Added support for experiment marker filenames (R_, Th_, etc.)
 import pandas as pd
 import numpy as np
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 import re
 import os
 import sys
+import io
+import math
+from collections import namedtuple
+from itertools import chain, repeat
+from functools import lru_cache
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+# Rust-based .xlsx reader, used through pandas' engine='calamine' (pandas >= 2.2)
+try:
+    import python_calamine  # noqa: F401
+    HAS_CALAMINE = tuple(int(v) for v in pd.__version__.split('.')[:2]) >= (2, 2)
+except ImportError:
+    HAS_CALAMINE = False
 
 try:
     import tkinter as tk
@@ -31,13 +52,44 @@ except ImportError:
 # Age group sort order
 AGE_ORDER = {'P7': 0, 'P14': 1, 'P28': 2, 'P56': 3, 'NEO': 4, 'ADULT': 5}
 
+# Age prefix at the start of a Subject_ID (P7_M1 -> P7)
+AGE_PREFIX_RE = re.compile(r'([A-Z]+\d*)')
+# Trailing dose number of a condition (PrePax10 -> PrePax)
+DOSE_RE = re.compile(r'\d+$')
+# Segment suffix of a Subject_ID (P7_M1.2 -> P7_M1)
+SEGMENT_SUFFIX_RE = re.compile(r'\.\d+(\.\d+)?$')
+# Segment number in a filename (_n2,1_ -> 2,1)
+SEGMENT_RE = re.compile(r'_n(\d+(?:,\d+)?)_')
+
+# Filename-base formats, tried in order by parse_subject_id
+SUBJECT_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    # Pattern 0: P7NEO_Male1 format
+    r'(\d{8})_(P\d+)NEO_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
+    # Pattern 1: NEO_Male1 or P14_Male1 or ADULT_Male1 format
+    r'(\d{8})_(NEO|P\d+|ADULT|Adult)_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
+    # Pattern 2: NEOMale1 or P14Male1 format (no underscore before sex)
+    r'(\d{8})_(NEO|P\d+|ADULT|Adult)([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
+    # Pattern 3: Experiment marker format - any project code (R_, Th_, Px_, KO_, Gd_, CPA_, etc.)
+    r'(\d{8})_([A-Za-z][A-Za-z0-9]*)_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
+    # Pattern 4: Simple format - Male1_n1 (no age or experiment marker)
+    r'(\d{8})_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
+]]
+
+# Header cell value, written in bold
+Bold = namedtuple('Bold', ['value'])
+
+# Header font, shared by every bold cell (openpyxl)
+BOLD = Font(bold=True)
+
+@lru_cache(maxsize=None)
 def get_age_prefix(subject_id):
     """Extract age prefix from Subject_ID like P7_M1 -> P7"""
-    match = re.match(r'([A-Z]+\d*)', str(subject_id))
+    match = AGE_PREFIX_RE.match(str(subject_id))
     if match:
         return match.group(1)
     return 'UNKNOWN'
 
+@lru_cache(maxsize=None)
 def sort_by_age_then_sex(subject_id):
     """Sort key: age group first, then sex, then number"""
     prefix = get_age_prefix(subject_id)
@@ -51,7 +103,7 @@ def _extract_condition_group(condition_str):
     Strips trailing digits (dose) and groups by Pre/Post + drug name."""
     s = str(condition_str)
     # Strip trailing digits (dose number)
-    base = re.sub(r'\d+$', '', s)
+    base = DOSE_RE.sub('', s)
     if base.startswith('Pre') and len(base) > 3:
         return base  # e.g., PrePax, PreRyan
     if base.startswith('Post') and len(base) > 4:
@@ -94,45 +146,36 @@ def detect_conditions(filenames):
         [c for c in raw if c not in ['Baseline', 'Y2'] and _extract_condition_group(c)])
     return conditions or ['Baseline'], all_treatments
 
-def get_condition(filename, treatments):
-    """Get condition from filename.
-    Pre*/Post* conditions map to their group name (e.g., PrePax10 -> PrePax)."""
-    f = str(filename)
-    if f.endswith('_Baseline'): return 'Baseline'
-    if f.endswith('_Y2'): return 'Y2'
-    last = f.split('_')[-1]
-    group = _extract_condition_group(last)
-    if group:
-        return group
-    for t in treatments:
-        if f.endswith(f'_{t}'): return 'Treatment'
-    return 'Baseline'
-
-def get_filename_base(filename, treatments):
-    """Remove condition suffix"""
-    f = str(filename)
-    for suffix in ['Baseline', 'Y2'] + treatments:
-        if f.endswith(f'_{suffix}'):
-            return f[:-len(f'_{suffix}')]
-    return f
+def split_condition(filenames, treatments):
+    """Split a column of filenames into (Filename_Base, Condition) columns.
+    The suffix after the last '_' is removed if it is Baseline, Y2 or a
+    treatment. Pre*/Post* suffixes map to their group name (e.g., PrePax10
+    -> PrePax), other treatments to 'Treatment', anything else to 'Baseline'."""
+    # Each name repeats across bins: split the distinct names, then expand
+    codes, names = pd.factorize(filenames.fillna('nan'))  # as str() of a missing name
+    treatments = set(treatments)
+    suffixes = treatments | {'Baseline', 'Y2'}
+    bases, conditions = [], []
+    for name in names:
+        head, sep, last = name.rpartition('_')
+        bases.append(head if sep and last in suffixes else name)
+        group = _extract_condition_group(last)
+        if sep and last == 'Y2':
+            conditions.append('Y2')
+        elif group:
+            conditions.append(group)
+        elif sep and last in treatments:
+            conditions.append('Treatment')
+        else:
+            conditions.append('Baseline')
+    return (pd.Series(np.array(bases, dtype=object)[codes], index=filenames.index),
+            pd.Series(np.array(conditions, dtype=object)[codes], index=filenames.index))
 
+@lru_cache(maxsize=None)
 def parse_subject_id(filename_base):
     """Parse filename to extract subject info - handles P7NEO, n2,1 etc."""
-    patterns = [
-        # Pattern 0: P7NEO_Male1 format
-        r'(\d{8})_(P\d+)NEO_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
-        # Pattern 1: NEO_Male1 or P14_Male1 or ADULT_Male1 format
-        r'(\d{8})_(NEO|P\d+|ADULT|Adult)_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
-        # Pattern 2: NEOMale1 or P14Male1 format (no underscore before sex)
-        r'(\d{8})_(NEO|P\d+|ADULT|Adult)([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
-        # Pattern 3: Experiment marker format - any project code (R_, Th_, Px_, KO_, Gd_, CPA_, etc.)
-        r'(\d{8})_([A-Za-z][A-Za-z0-9]*)_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
-        # Pattern 4: Simple format - Male1_n1 (no age or experiment marker)
-        r'(\d{8})_([MF]|Male|male|Female|female)(\d+)_n(\d+(?:,\d+)?)',
-    ]
-    
-    for i, pattern in enumerate(patterns):
-        match = re.match(pattern, filename_base, re.IGNORECASE)
+    for i, pattern in enumerate(SUBJECT_PATTERNS):
+        match = pattern.match(filename_base)
         if match:
             g = match.groups()
             if i == 0:
@@ -157,6 +200,7 @@ def parse_subject_id(filename_base):
             }
     return None
 
+@lru_cache(maxsize=None)
 def get_sex(subject_id):
     """Get sex from Subject_ID"""
     s = str(subject_id).upper()
@@ -188,26 +232,83 @@ def auto_assign_ids(filename_bases):
     
     return {a['filename_base']: unique_to_id[a['unique_key']] for a in parsed}
 
+@lru_cache(maxsize=None)
 def get_animal_base(subject_id):
     """Remove segment suffix"""
-    return re.sub(r'\.\d+(\.\d+)?$', '', str(subject_id))
+    return SEGMENT_SUFFIX_RE.sub('', str(subject_id))
 
 def calc_pct_change(baseline, new_val):
-    """Calculate percent change"""
-    if pd.isna(baseline) or pd.isna(new_val) or baseline == 0:
-        return np.nan
-    pct = ((new_val - baseline) / baseline) * 100
-    return round(pct) if not (pd.isna(pct) or np.isinf(pct)) else np.nan
+    """Calculate percent change, rounded to whole percent.
+    Element-wise on arrays; NaN where either value is missing, the
+    baseline is zero or the result is not finite"""
+    baseline = np.asarray(baseline, dtype=float)
+    new_val = np.asarray(new_val, dtype=float)
+    with np.errstate(all='ignore'):
+        pct = ((new_val - baseline) / baseline) * 100
+    return np.where((baseline == 0) | ~np.isfinite(pct), np.nan, np.round(pct))
+
+def bold_cell(ws, value):
+    """Bold cell for an openpyxl write-only sheet"""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = BOLD
+    return cell
 
-def add_source_sheet(wb, df, name, color):
-    """Add source data sheet"""
-    ws = wb.create_sheet(title=name)
-    ws.sheet_properties.tabColor = color
-    for c, col in enumerate(df.columns, 1):
-        ws.cell(1, c, col).font = Font(bold=True)
-    for r, row in enumerate(df.itertuples(index=False), 2):
-        for c, val in enumerate(row, 1):
-            if pd.notna(val): ws.cell(r, c, val)
+def frame_values(df):
+    """Rows of a DataFrame as tuples, with missing values as None"""
+    # Mask the whole frame once rather than testing every cell
+    values = df.astype(object).where(df.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+def save_workbook(output_file, sheets):
+    """
+    Write sheets to an .xlsx file row by row.
+    
+    sheets is a list of (name, tab color, rows); a row is a list of cell
+    values, where None leaves the cell empty and Bold(value) is a bold
+    header. rows may also be a DataFrame (source data), written as a bold
+    header row followed by its values. Uses xlsxwriter in constant_memory
+    mode when installed, otherwise an openpyxl write-only Workbook.
+    """
+    if not HAS_XLSXWRITER:
+        wb = Workbook(write_only=True)
+        for name, color, rows in sheets:
+            ws = wb.create_sheet(name)
+            if isinstance(rows, pd.DataFrame):
+                rows = chain([[Bold(col) for col in rows.columns]], frame_values(rows))
+            # Full ARGB: a 6-digit RGB would get a 00 (transparent) alpha
+            ws.sheet_properties.tabColor = f'FF{color}'
+            for row in rows:
+                ws.append([bold_cell(ws, v.value) if isinstance(v, Bold) else v for v in row])
+        wb.save(output_file)
+        return
+    
+    wb = xlsxwriter.Workbook(output_file, {'constant_memory': True,
+                                           'nan_inf_to_errors': True,
+                                           'strings_to_urls': False})
+    try:
+        bold_format = wb.add_format({'bold': True})
+        for name, color, rows in sheets:
+            ws = wb.add_worksheet(name)
+            ws.set_tab_color(f'#{color}')
+            if isinstance(rows, pd.DataFrame):
+                # Plain values with None for missing: a whole row per call
+                ws.write_row(0, 0, rows.columns, bold_format)
+                for r, row in enumerate(frame_values(rows), 1):
+                    ws.write_row(r, 0, row)
+                continue
+            for r, row in enumerate(rows):
+                if any(isinstance(v, Bold) for v in row):
+                    for c, v in enumerate(row):
+                        if isinstance(v, Bold):
+                            ws.write(r, c, v.value, bold_format)
+                        elif v is not None and not (isinstance(v, float) and math.isnan(v)):
+                            ws.write(r, c, v)
+                else:
+                    # Data row: one call, NaN as an empty cell (None)
+                    ws.write_row(r, 0, [None if isinstance(v, float) and math.isnan(v) else v
+                                        for v in row])
+    finally:
+        wb.close()
 
 def process_file(input_file, exclude_subjects=None):
     """Main processing function"""
@@ -217,17 +318,20 @@ def process_file(input_file, exclude_subjects=None):
     print(f"\nProcessing: {os.path.basename(input_file)}")
     
     try:
-        xlsx = pd.ExcelFile(input_file)
+        xlsx = pd.ExcelFile(input_file, engine='calamine' if HAS_CALAMINE else None)
     except Exception as e:
         print(f"  ERROR: {e}")
         return None
     
-    if 'Overall_Metrics' not in xlsx.sheet_names or '10sec_Bins' not in xlsx.sheet_names:
-        print("  ERROR: Missing required sheets")
-        return None
-    
-    df_overall_orig = pd.read_excel(xlsx, 'Overall_Metrics')
-    df_10sec_orig = pd.read_excel(xlsx, '10sec_Bins')
+    # One handle for both sheets, closed on every path (an open handle keeps
+    # the input locked on Windows)
+    with xlsx:
+        if 'Overall_Metrics' not in xlsx.sheet_names or '10sec_Bins' not in xlsx.sheet_names:
+            print("  ERROR: Missing required sheets")
+            return None
+        
+        df_overall_orig = xlsx.parse('Overall_Metrics')
+        df_10sec_orig = xlsx.parse('10sec_Bins')
     df_overall = df_overall_orig.copy()
     df_10sec = df_10sec_orig.copy()
     
@@ -239,7 +343,7 @@ def process_file(input_file, exclude_subjects=None):
     print(f"  Conditions: {conditions}")
     
     # Build subject mapping
-    df_overall['FB_Temp'] = df_overall['Filename'].apply(lambda x: get_filename_base(x, treatments))
+    df_overall['FB_Temp'], df_overall['Condition'] = split_condition(df_overall['Filename'], treatments)
     mapping = auto_assign_ids(df_overall['FB_Temp'].unique())
     
     if not mapping:
@@ -251,15 +355,11 @@ def process_file(input_file, exclude_subjects=None):
     # Apply mapping with segment suffix
     df_overall['Subject_ID_Base'] = df_overall['FB_Temp'].map(mapping)
     
-    def add_segment(row):
-        base = row['Subject_ID_Base']
-        if pd.isna(base): return 'Unknown'
-        match = re.search(r'_n(\d+(?:,\d+)?)_', row['Filename'])
-        return f"{base}.{match.group(1).replace(',', '.')}" if match else str(base)
-    
-    df_overall['Subject_ID'] = df_overall.apply(add_segment, axis=1)
-    df_overall['Condition'] = df_overall['Filename'].apply(lambda x: get_condition(x, treatments))
-    df_overall['Sex'] = df_overall['Subject_ID'].apply(get_sex)
+    base = df_overall['Subject_ID_Base'].astype(str)
+    segment = df_overall['Filename'].str.extract(SEGMENT_RE, expand=False).str.replace(',', '.')
+    subject_id = (base + '.' + segment).fillna(base)
+    df_overall['Subject_ID'] = subject_id.mask(df_overall['Subject_ID_Base'].isna(), 'Unknown')
+    df_overall['Sex'] = df_overall['Subject_ID'].map(get_sex)
     df_overall['Filename_Base'] = df_overall['FB_Temp']
     df_overall.drop(['FB_Temp', 'Subject_ID_Base'], axis=1, inplace=True)
     
@@ -268,10 +368,9 @@ def process_file(input_file, exclude_subjects=None):
     # Create filename to subject map for bin data
     fn_to_subj = df_overall.drop_duplicates('Filename_Base').set_index('Filename_Base')['Subject_ID'].to_dict()
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Overall"
-    ws.sheet_properties.tabColor = "FFC000"
+    # Each sheet is collected as a list of rows and written by save_workbook
+    rows = []
+    sheets = [("Overall", "FFC000", rows)]
     
     metrics = [c for c in df_overall.columns if c not in 
                ['Filename', 'Subject_ID', 'Condition', 'Sex', 'Filename_Base', df_overall.columns[0]]]
@@ -283,30 +382,57 @@ def process_file(input_file, exclude_subjects=None):
             continue
         pct_cols.append((c, f'%chg_{c}'))
     
-    col = 1
-    for h in ["Sex", "Subject_ID", "Filename_Base"]:
-        ws.cell(1, col, h).font = Font(bold=True)
-        ws.cell(2, col, h).font = Font(bold=True)
-        col += 1
-    
+    # Column positions (1-based): 3 ID columns, then per metric its
+    # conditions, %change columns and a blank spacer column
+    col = 4
+    metric_col = {}
     col_map, pct_map = {}, {}
     for i, m in enumerate(metrics):
-        ws.cell(1, col, m).font = Font(bold=True)
+        metric_col[m] = col
         for c in conditions:
-            ws.cell(2, col, c).font = Font(bold=True)
             col_map[(m, c)] = col
             col += 1
         for c, lbl in pct_cols:
-            ws.cell(2, col, lbl).font = Font(bold=True)
             pct_map[(m, c)] = col
             col += 1
         if i < len(metrics) - 1: col += 1
+    n_cols = col - 1
+    
+    header1 = [None] * n_cols
+    header2 = [None] * n_cols
+    for i, h in enumerate(["Sex", "Subject_ID", "Filename_Base"]):
+        header1[i] = Bold(h)
+        header2[i] = Bold(h)
+    for m in metrics:
+        header1[metric_col[m] - 1] = Bold(m)
+        for c in conditions:
+            header2[col_map[(m, c)] - 1] = Bold(c)
+        for c, lbl in pct_cols:
+            header2[pct_map[(m, c)] - 1] = Bold(lbl)
+    rows.append(header1)
+    rows.append(header2)
     
     # Write data - SORTED BY AGE THEN SEX
     subjects = sorted(df_filtered['Subject_ID'].unique(), key=sort_by_age_then_sex)
     subj_fb_map = df_filtered.drop_duplicates('Subject_ID').set_index('Subject_ID')['Filename_Base'].to_dict()
     
-    row = 3
+    # Metric values of the first row of each (subject, condition), looked up
+    # instead of filtering df_filtered again for every metric and condition
+    first = df_filtered.drop_duplicates(['Subject_ID', 'Condition'])
+    first_keys = list(zip(first['Subject_ID'], first['Condition']))
+    first_vals = dict(zip(first_keys, first[metrics].itertuples(index=False, name=None)))
+    # The same rows as float arrays for the %change columns (text such as
+    # Amplitude_Flag counts as missing)
+    first_num = dict(zip(first_keys, first[metrics].apply(pd.to_numeric, errors='coerce')
+                                                   .to_numpy(dtype=float)))
+    no_values = np.full(len(metrics), np.nan)
+    
+    # %change of every subject, condition and metric in a single call
+    pct_keys = [(subj, c) for subj in subjects for c, _ in pct_cols if (subj, c) in first_num]
+    subj_pcts = dict(zip(pct_keys, calc_pct_change(
+        [first_num.get((subj, 'Baseline'), no_values) for subj, _ in pct_keys],
+        [first_num[key] for key in pct_keys])))
+    
     last_prefix, last_sex = None, None
     
     for subj in subjects:
@@ -315,40 +441,57 @@ def process_file(input_file, exclude_subjects=None):
         
         # Blank row between age groups or between sexes within group
         if last_prefix is not None and (prefix != last_prefix or sex != last_sex):
-            row += 1
+            rows.append([])
         last_prefix, last_sex = prefix, sex
         
-        data = df_filtered[df_filtered['Subject_ID'] == subj]
-        ws.cell(row, 1, sex)
-        ws.cell(row, 2, subj)
-        ws.cell(row, 3, subj_fb_map.get(subj, ''))
+        values = [None] * n_cols
+        values[0] = sex
+        values[1] = subj
+        values[2] = subj_fb_map.get(subj, '')
         
-        for m in metrics:
-            bl_data = data[data['Condition'] == 'Baseline']
-            bl_val = bl_data[m].iloc[0] if len(bl_data) > 0 else np.nan
-            
+        pcts = {c: subj_pcts[(subj, c)] for c, _ in pct_cols if (subj, c) in subj_pcts}
+        
+        for j, m in enumerate(metrics):
             for c in conditions:
-                cond_data = data[data['Condition'] == c]
-                if len(cond_data) > 0:
-                    val = cond_data[m].iloc[0]
-                    if pd.notna(val): ws.cell(row, col_map[(m, c)], val)
+                cond_row = first_vals.get((subj, c))
+                if cond_row is not None:
+                    val = cond_row[j]
+                    if pd.notna(val): values[col_map[(m, c)] - 1] = val
             
-            for c, _ in pct_cols:
-                cond_data = data[data['Condition'] == c]
-                if len(cond_data) > 0:
-                    pct = calc_pct_change(bl_val, cond_data[m].iloc[0])
-                    if pd.notna(pct): ws.cell(row, pct_map[(m, c)], int(pct))
-        row += 1
+            for c, pct in pcts.items():
+                if not np.isnan(pct[j]): values[pct_map[(m, c)] - 1] = int(pct[j])
+        rows.append(values)
     
     # Animal averages
-    df_filtered['Animal_Base'] = df_filtered['Subject_ID'].apply(get_animal_base)
-    df_filtered['Date_Prefix'] = df_filtered['Filename_Base'].apply(lambda x: str(x).split('_')[0])
+    df_filtered['Animal_Base'] = df_filtered['Subject_ID'].map(get_animal_base)
+    df_filtered['Date_Prefix'] = df_filtered['Filename_Base'].str.partition('_')[0]
     
-    row += 1
-    ws.cell(row, 2, "Averages per Animal").font = Font(bold=True)
-    row += 1
+    rows.append([])
+    rows.append([None, Bold("Averages per Animal")])
     
     animals = sorted(df_filtered['Animal_Base'].unique(), key=sort_by_age_then_sex)
+    # Row positions of each (animal, condition), found in one pass
+    animal_rows = df_filtered.groupby(['Animal_Base', 'Condition']).indices
+    animal_date = df_filtered.drop_duplicates('Animal_Base').set_index('Animal_Base')['Date_Prefix'].to_dict()
+    
+    # Per animal and condition, the mean of each metric (NaN when it has no
+    # values); Series.mean on the same rows as before, so the averages are unchanged
+    animal_means = {}
+    for animal in animals:
+        for c in {'Baseline', *conditions}:
+            animal_means[(animal, c)] = cond_means = np.full(len(metrics), np.nan)
+            idx = animal_rows.get((animal, c))
+            if idx is None: continue
+            for j, m in enumerate(metrics):
+                vals = df_filtered[m].take(idx).dropna()
+                if len(vals) > 0: cond_means[j] = vals.mean()
+    
+    # %change of every animal, condition and metric in a single call
+    pct_keys = [(animal, c) for animal in animals for c, _ in pct_cols]
+    animal_pcts = dict(zip(pct_keys, calc_pct_change(
+        [animal_means[(animal, 'Baseline')] for animal, _ in pct_keys],
+        [animal_means[key] for key in pct_keys])))
+    
     last_prefix, last_sex = None, None
     
     for animal in animals:
@@ -356,32 +499,24 @@ def process_file(input_file, exclude_subjects=None):
         sex = get_sex(animal)
         
         if last_prefix is not None and (prefix != last_prefix or sex != last_sex):
-            row += 1
+            rows.append([])
         last_prefix, last_sex = prefix, sex
         
-        data = df_filtered[df_filtered['Animal_Base'] == animal]
-        date_pfx = data['Date_Prefix'].iloc[0]
+        values = [None] * n_cols
+        values[1] = animal
+        values[2] = f"{animal_date[animal]}_{animal}"
         
-        ws.cell(row, 2, animal)
-        ws.cell(row, 3, f"{date_pfx}_{animal}")
+        pcts = {c: animal_pcts[(animal, c)] for c, _ in pct_cols}
         
-        for m in metrics:
+        for j, m in enumerate(metrics):
             for c in conditions:
-                vals = data[data['Condition'] == c][m].dropna()
-                if len(vals) > 0:
-                    mean = vals.mean()
-                    if pd.notna(mean) and not np.isinf(mean):
-                        ws.cell(row, col_map[(m, c)], mean)
+                mean = animal_means[(animal, c)][j]
+                if pd.notna(mean) and not np.isinf(mean):
+                    values[col_map[(m, c)] - 1] = mean
             
-            bl_vals = data[data['Condition'] == 'Baseline'][m].dropna()
-            bl_mean = bl_vals.mean() if len(bl_vals) > 0 else np.nan
-            
-            for c, _ in pct_cols:
-                vals = data[data['Condition'] == c][m].dropna()
-                if len(vals) > 0:
-                    pct = calc_pct_change(bl_mean, vals.mean())
-                    if pd.notna(pct): ws.cell(row, pct_map[(m, c)], int(pct))
-        row += 1
+            for c, pct in pcts.items():
+                if not np.isnan(pct[j]): values[pct_map[(m, c)] - 1] = int(pct[j])
+        rows.append(values)
     
     # 10-second bin sheets
     bin_metrics = {
@@ -394,128 +529,165 @@ def process_file(input_file, exclude_subjects=None):
     available = {m: m for m in bin_metrics if m in df_10sec.columns}
     print(f"  Bin metrics: {list(available.keys())}")
     
-    df_10sec['Filename_Base'] = df_10sec['Filename'].apply(lambda x: get_filename_base(x, treatments))
-    df_10sec['Condition'] = df_10sec['Filename'].apply(lambda x: get_condition(x, treatments))
+    df_10sec['Filename_Base'], df_10sec['Condition'] = split_condition(df_10sec['Filename'], treatments)
     df_10sec['Subject_ID'] = df_10sec['Filename_Base'].map(fn_to_subj)
-    df_10sec['Sex'] = df_10sec['Subject_ID'].apply(get_sex)
-    df_10sec['Animal_Base'] = df_10sec['Subject_ID'].apply(get_animal_base)
-    df_10sec['Date_Prefix'] = df_10sec['Filename_Base'].apply(lambda x: str(x).split('_')[0])
+    df_10sec['Sex'] = df_10sec['Subject_ID'].map(get_sex)
+    df_10sec['Animal_Base'] = df_10sec['Subject_ID'].map(get_animal_base)
+    df_10sec['Date_Prefix'] = df_10sec['Filename_Base'].str.partition('_')[0]
     df_10sec_clean = df_10sec.dropna(subset=['Subject_ID'])
     df_10sec_clean = df_10sec_clean[~df_10sec_clean['Subject_ID'].isin(exclude_subjects)]
     
     headers = ['Sex', 'Subject_ID', 'Filename_Base'] + [f'{c}_{s}' for c in conditions for s in ['Mean', 'SD', 'n']]
     
+    # Row positions of each (subject or animal, condition) and each subject's
+    # first row, found once and shared by every bin metric
+    bin_subj_rows = df_10sec_clean.groupby(['Subject_ID', 'Condition']).indices
+    bin_animal_rows = df_10sec_clean.groupby(['Animal_Base', 'Condition']).indices
+    bin_subj_first = df_10sec_clean.drop_duplicates('Subject_ID').set_index('Subject_ID')
+    bin_subj_sex = bin_subj_first['Sex'].to_dict()
+    bin_subj_fb = bin_subj_first['Filename_Base'].to_dict()
+    bin_animal_date = df_10sec_clean.drop_duplicates('Animal_Base').set_index('Animal_Base')['Date_Prefix'].to_dict()
+    # Subjects and animals in sheet order, the same for every bin metric
+    bin_subjects = sorted(df_10sec_clean['Subject_ID'].unique(), key=sort_by_age_then_sex)
+    bin_animals = sorted(df_10sec_clean['Animal_Base'].unique(), key=sort_by_age_then_sex)
+    
+    def group_values(col, valid, groups, key):
+        """Non-missing values of col in the rows of one group; valid is
+        col.notna() as an array, so missing rows are dropped by position"""
+        idx = groups.get(key)
+        return col.take(idx[valid[idx]]) if idx is not None else col.iloc[:0]
+    
+    # Raw bin rows are listed in the same order on every sheet: sort once,
+    # by subject (age, then sex), Baseline before the other conditions, then bin
+    subj_rank = {subj: i for i, subj in enumerate(bin_subjects)}
+    df_sorted = df_10sec_clean.assign(
+        _subj_rank=df_10sec_clean['Subject_ID'].map(subj_rank),
+        _cond_rank=(df_10sec_clean['Condition'] != 'Baseline').astype(int),
+    ).sort_values(['_subj_rank', '_cond_rank', 'Bin'])
+    # As plain lists, walked once per sheet without going through pandas
+    raw_id_cols = [df_sorted[c].tolist() if c in df_sorted.columns else [''] * len(df_sorted)
+                   for c in ['Sex', 'Subject_ID', 'Condition', 'Bin', 'Time_Start_sec', 'Time_End_sec']]
+    
     print("  Creating bin sheets...")
     for metric, short in bin_metrics.items():
         if metric not in available: continue
+        col_m = df_10sec_clean[metric]
+        valid_m = col_m.notna().to_numpy()
         
-        ws_m = wb.create_sheet(f"10s_{short}")
-        ws_m.sheet_properties.tabColor = "4472C4"
-        ws_m.cell(1, 1, f"{metric} (10s)").font = Font(bold=True)
-        
-        for c, h in enumerate(headers, 1):
-            ws_m.cell(3, c, h).font = Font(bold=True)
+        rows = []
+        sheets.append((f"10s_{short}", "4472C4", rows))
+        rows.append([Bold(f"{metric} (10s)")])
+        rows.append([])
+        rows.append([Bold(h) for h in headers])
         
         # Per-subject stats
         stats = []
-        for subj in sorted(df_10sec_clean['Subject_ID'].unique(), key=sort_by_age_then_sex):
-            d = df_10sec_clean[df_10sec_clean['Subject_ID'] == subj]
-            r = {'Sex': d['Sex'].iloc[0], 'Subject_ID': subj, 'Filename_Base': d['Filename_Base'].iloc[0]}
+        for subj in bin_subjects:
+            r = {'Sex': bin_subj_sex[subj], 'Subject_ID': subj, 'Filename_Base': bin_subj_fb[subj]}
             for c in conditions:
-                vals = d[d['Condition'] == c][metric].dropna()
+                vals = group_values(col_m, valid_m, bin_subj_rows, (subj, c))
                 r[f'{c}_Mean'] = vals.mean() if len(vals) > 0 else np.nan
                 r[f'{c}_SD'] = vals.std(ddof=1) if len(vals) > 1 else np.nan
                 r[f'{c}_n'] = int(len(vals))
             stats.append(r)
         
-        row = 4
         last_prefix, last_sex = None, None
         for s in stats:
             prefix = get_age_prefix(s['Subject_ID'])
             sex = s['Sex']
             if last_prefix is not None and (prefix != last_prefix or sex != last_sex):
-                row += 1
+                rows.append([])
             last_prefix, last_sex = prefix, sex
             
-            for c, h in enumerate(headers, 1):
-                ws_m.cell(row, c, s.get(h, ''))
-            row += 1
+            rows.append([s.get(h, '') for h in headers])
         
         # Animal averages
-        row += 1
-        ws_m.cell(row, 2, "Averages per Animal").font = Font(bold=True)
-        row += 1
+        rows.append([])
+        rows.append([None, Bold("Averages per Animal")])
         
         last_prefix, last_sex = None, None
-        for animal in sorted(df_10sec_clean['Animal_Base'].unique(), key=sort_by_age_then_sex):
+        for animal in bin_animals:
             prefix = get_age_prefix(animal)
             sex = get_sex(animal)
             if last_prefix is not None and (prefix != last_prefix or sex != last_sex):
-                row += 1
+                rows.append([])
             last_prefix, last_sex = prefix, sex
             
-            d = df_10sec_clean[df_10sec_clean['Animal_Base'] == animal]
-            ws_m.cell(row, 1, sex)
-            ws_m.cell(row, 2, animal)
-            ws_m.cell(row, 3, f"{d['Date_Prefix'].iloc[0]}_{animal}")
-            
-            col = 4
+            values = [sex, animal, f"{bin_animal_date[animal]}_{animal}"]
             for c in conditions:
-                vals = d[d['Condition'] == c][metric].dropna()
-                ws_m.cell(row, col, vals.mean() if len(vals) > 0 else '')
-                ws_m.cell(row, col+1, vals.std(ddof=1) if len(vals) > 1 else '')
-                ws_m.cell(row, col+2, int(len(vals)))
-                col += 3
-            row += 1
+                vals = group_values(col_m, valid_m, bin_animal_rows, (animal, c))
+                values.append(vals.mean() if len(vals) > 0 else '')
+                values.append(vals.std(ddof=1) if len(vals) > 1 else '')
+                values.append(int(len(vals)))
+            rows.append(values)
         
         # Raw bin data
-        row += 2
-        ws_m.cell(row, 1, "Raw Bin Data").font = Font(bold=True)
-        row += 1
+        rows.append([])
+        rows.append([])
+        rows.append([Bold("Raw Bin Data")])
         raw_h = ['Sex', 'Subject_ID', 'Condition', 'Bin', 'Time_Start', 'Time_End', metric]
-        for c, h in enumerate(raw_h, 1):
-            ws_m.cell(row, c, h).font = Font(bold=True)
-        row += 1
-        
-        df_sorted = df_10sec_clean.sort_values(['Subject_ID', 'Condition', 'Bin'],
-            key=lambda x: x.map(lambda v: sort_by_age_then_sex(v) if x.name == 'Subject_ID' 
-                else (0 if v == 'Baseline' else 1) if x.name == 'Condition' else v))
+        rows.append([Bold(h) for h in raw_h])
         
+        # Walk the sorted columns together instead of building a Series per row
         last_subj = None
-        for _, r in df_sorted.iterrows():
-            if last_subj and r['Subject_ID'] != last_subj: row += 1
-            last_subj = r['Subject_ID']
-            ws_m.cell(row, 1, r['Sex'])
-            ws_m.cell(row, 2, r['Subject_ID'])
-            ws_m.cell(row, 3, r['Condition'])
-            ws_m.cell(row, 4, r.get('Bin', ''))
-            ws_m.cell(row, 5, r.get('Time_Start_sec', ''))
-            ws_m.cell(row, 6, r.get('Time_End_sec', ''))
-            ws_m.cell(row, 7, r.get(metric, ''))
-            row += 1
-    
-    add_source_sheet(wb, df_overall_orig, "SRC_Overall", "A6A6A6")
-    add_source_sheet(wb, df_10sec_orig, "SRC_10sec_Bins", "A6A6A6")
-    
-    wb.save(output_file)
+        for values in zip(*raw_id_cols, df_sorted[metric].tolist()):
+            if last_subj and values[1] != last_subj: rows.append([])
+            last_subj = values[1]
+            rows.append(values)
+    
+    sheets.append(("SRC_Overall", "A6A6A6", df_overall_orig))
+    sheets.append(("SRC_10sec_Bins", "A6A6A6", df_10sec_orig))
+    
+    save_workbook(output_file, sheets)
     print(f"\n  ✓ Saved: {output_file}")
     return output_file
 
+def _process_file_logged(input_file, exclude_subjects=None):
+    """process_file in a worker process; returns (output file, printed log)"""
+    log = io.StringIO()
+    with redirect_stdout(log):
+        output_file = process_file(input_file, exclude_subjects)
+    return output_file, log.getvalue()
+
+def _available_cpus():
+    """
+    Number of CPUs this process may run on: the affinity mask (taskset,
+    cluster job slots) where available, else os.cpu_count().
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        return os.cpu_count() or 1
+
+def process_files(input_files, exclude_subjects=None):
+    """
+    Process several files, one worker process per file (up to the available
+    CPUs). Each file's log is printed in input order as it finishes.
+    """
+    n_workers = min(len(input_files), _available_cpus())
+    if n_workers <= 1:
+        return [process_file(f, exclude_subjects) for f in input_files]
+    
+    output_files = []
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for output_file, log in pool.map(_process_file_logged, input_files,
+                                         repeat(exclude_subjects)):
+            print(log, end='')
+            output_files.append(output_file)
+    return output_files
+
 
 if __name__ == "__main__":
     # Handle drag-and-drop or command line argument
     if len(sys.argv) > 1:
-        for f in sys.argv[1:]:
-            if os.path.exists(f) and f.endswith('.xlsx'):
-                process_file(f)
+        process_files([f for f in sys.argv[1:] if os.path.exists(f) and f.endswith('.xlsx')])
         input("\nPress Enter to exit...")
     elif HAS_TK:
         root = tk.Tk()
         root.withdraw()
         files = filedialog.askopenfilenames(title="Select Excel File(s)", 
             filetypes=[("Excel files", "*.xlsx")])
-        for f in files:
-            process_file(f)
+        process_files(list(files))
         if files:
             messagebox.showinfo("Done", f"Processed {len(files)} file(s)!")
     else: